@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""
+Directory Bookmark Manager - Selector Latency Benchmark
+Drives `bookmark.py --go` through a pseudo-terminal against synthetic
+bookmark stores and measures per-key time-to-frame and bytes per frame.
+With --memory it also reports how much memory the loaded bookmarks take.
+
+Author: Hasin Hayder
+Repository: https://github.com/hasinhayder/bookomark.py
+License: MIT
+"""
+
+import argparse
+import json
+import os
+import select
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Tuple
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+
+# Byte sequences a terminal sends for each scripted key
+KEYS = {
+    "down": b"\x1b[B",
+    "up": b"\x1b[A",
+    "pgdn": b"\x1b[6~",
+    "pgup": b"\x1b[5~",
+    "home": b"\x1b[H",
+    "end": b"\x1b[F",
+    "backspace": b"\x7f",
+    "ctrl-u": b"\x15",
+}
+
+# Every frame ends with the footer hint; its start marks a complete frame
+FRAME_MARKER = "↑/↓ move".encode("utf-8")
+# Headers drawn while the store is still being parsed carry this tag
+LOADING_MARKER = b", loading)"
+UNBUDGETED = ("first-frame", "loaded", "digit")
+
+
+def synthetic_entries(size: int) -> Iterator[Tuple[str, str]]:
+    """Yield size (name, path) bookmarks with shared path prefixes.
+
+    Args:
+        size: Number of bookmarks
+
+    Yields:
+        Tuple[str, str]: Freshly built (name, path) strings
+    """
+    for i in range(size):
+        yield f"project-{i:06d}", f"/home/bench/work/team-{i % 37:02d}/repo-{i % 101:03d}/project-{i:06d}"
+
+
+def make_store(home: Path, size: int) -> None:
+    """Write a synthetic store of size bookmarks with shared path prefixes.
+
+    Args:
+        home: Directory used as HOME for the benchmarked process
+        size: Number of bookmarks
+    """
+    with open(home / ".dir-bookmarks.txt", "w", encoding="utf-8") as f:
+        f.write("# Directory Bookmarks - Format: name|path\n\n")
+        for name, path in synthetic_entries(size):
+            f.write(f"{name}|{path}\n")
+
+
+def measure_memory(size: int) -> Dict[str, float]:
+    """Measure the memory held by a sorted bookmark list in both representations.
+
+    Entries are built from fresh strings, as parsing the file would produce,
+    and tracemalloc reports what is still allocated once each is built.
+
+    Args:
+        size: Store size
+
+    Returns:
+        Dict[str, float]: KiB held by a list of tuples and by a BookmarkTable
+    """
+    import tracemalloc
+
+    sys.path.insert(0, str(SCRIPT_DIR))
+    from bookmark import BookmarkTable
+
+    def retained(build) -> float:
+        tracemalloc.start()
+        try:
+            held = build()  # noqa: F841 - kept alive until measured
+            return tracemalloc.get_traced_memory()[0] / 1024
+        finally:
+            tracemalloc.stop()
+
+    return {
+        "tuples_kib": retained(lambda: sorted(synthetic_entries(size), key=lambda x: x[0].lower())),
+        "table_kib": retained(lambda: BookmarkTable(synthetic_entries(size)).sorted_by_name()),
+    }
+
+
+def last_frame(buf: bytearray) -> bytes:
+    """Return the output of the most recent complete frame."""
+    end = buf.rfind(FRAME_MARKER)
+    start = buf.rfind(FRAME_MARKER, 0, max(end, 0))
+    return bytes(buf[max(start, 0) : max(end, 0)])
+
+
+def key_script(size: int) -> List[Tuple[str, bytes]]:
+    """Build the keystroke sequence for one session.
+
+    Typing, backspacing, arrows, paging and Home/End are measured first;
+    the session ends with a digit jump that selects an entry and exits.
+
+    Args:
+        size: Store size (the final digit jump must be in range)
+
+    Returns:
+        List[Tuple[str, bytes]]: (key class, bytes) pairs
+    """
+    script = [("type", ch.encode()) for ch in "proj"]
+    script += [("backspace", KEYS["backspace"])] * 4
+    script += [("down", KEYS["down"])] * 20 + [("up", KEYS["up"])] * 5
+    script += [("pgdn", KEYS["pgdn"])] * 3 + [("pgup", KEYS["pgup"])]
+    script += [("end", KEYS["end"]), ("home", KEYS["home"])]
+    # Digits filter only after a letter; on an empty filter they jump by number
+    script += [("type", ch.encode()) for ch in "p042"] + [("ctrl-u", KEYS["ctrl-u"])]
+    # Digits jump by number; the last one makes the number unique and selects
+    script += [("digit", ch.encode()) for ch in str(size)]
+    return script
+
+
+def run_session(size: int, rows: int, cols: int, preview: bool, timeout: float) -> List[Dict]:
+    """Run one selector session in a pty and time every scripted key.
+
+    Args:
+        size: Store size
+        rows: Terminal rows
+        cols: Terminal columns
+        preview: Enable the selector's preview pane
+        timeout: Seconds to wait for a frame before giving up
+
+    Returns:
+        List[Dict]: One sample per key with class, latency (ms) and bytes;
+        the first two samples ("first-frame", "loaded") time the startup,
+        and the first also records whether its frame was still loading
+    """
+    import fcntl
+    import pty
+    import struct
+    import termios
+
+    home = Path(tempfile.mkdtemp(prefix="bookmark-bench-"))
+    try:
+        make_store(home, size)
+        pid, fd = pty.fork()
+        if pid == 0:
+            fcntl.ioctl(0, termios.TIOCSWINSZ, struct.pack("HHHH", rows, cols, 0, 0))
+            env = dict(os.environ, HOME=str(home), TERM="xterm", COLUMNS=str(cols), LINES=str(rows))
+            env["BOOKMARK_PREVIEW"] = "1" if preview else "0"
+            env["XDG_CACHE_HOME"] = str(home / ".cache")
+            os.execvpe(sys.executable, [sys.executable, str(SCRIPT_DIR / "bookmark.py"), "--go"], env)
+
+        def read_frame(frames_before: int, buf: bytearray) -> Tuple[bool, int]:
+            """Read until another frame completes or the process exits."""
+            deadline = time.perf_counter() + timeout
+            start = len(buf)
+            while buf.count(FRAME_MARKER) <= frames_before:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0 or not select.select([fd], [], [], remaining)[0]:
+                    return False, len(buf) - start
+                try:
+                    data = os.read(fd, 65536)
+                except OSError:
+                    return True, len(buf) - start  # EIO: selector exited
+                if not data:
+                    return True, len(buf) - start
+                buf.extend(data)
+            # Pick up the rest of the frame (the footer line itself)
+            while select.select([fd], [], [], 0.002)[0]:
+                try:
+                    data = os.read(fd, 65536)
+                except OSError:
+                    break
+                if not data:
+                    break
+                buf.extend(data)
+            return False, len(buf) - start
+
+        buf = bytearray()
+        t0 = time.perf_counter()
+        read_frame(0, buf)
+        samples = [
+            {
+                "key": "first-frame",
+                "ms": (time.perf_counter() - t0) * 1000,
+                "bytes": len(buf),
+                "exited": False,
+                "loading": LOADING_MARKER in last_frame(buf),
+            }
+        ]
+        # Keys are only scripted once the whole store is in the list
+        while LOADING_MARKER in last_frame(buf):
+            exited, _ = read_frame(buf.count(FRAME_MARKER), buf)
+            if exited:
+                break
+        samples.append({"key": "loaded", "ms": (time.perf_counter() - t0) * 1000, "bytes": len(buf), "exited": False})
+        for key_class, data in key_script(size):
+            frames = buf.count(FRAME_MARKER)
+            t0 = time.perf_counter()
+            os.write(fd, data)
+            exited, nbytes = read_frame(frames, buf)
+            samples.append(
+                {"key": key_class, "ms": (time.perf_counter() - t0) * 1000, "bytes": nbytes, "exited": exited}
+            )
+            if exited:
+                break
+        try:
+            os.write(fd, b"\x03")
+        except OSError:
+            pass
+        os.close(fd)
+        os.waitpid(pid, 0)
+        return samples
+    finally:
+        shutil.rmtree(home, ignore_errors=True)
+
+
+def summarize(samples: List[Dict]) -> Dict[str, Dict[str, float]]:
+    """Aggregate samples per key class.
+
+    Args:
+        samples: Samples from run_session
+
+    Returns:
+        Dict[str, Dict[str, float]]: Per class: count, p50/p95/max ms, mean bytes,
+        and for the first frame how many were drawn while still loading
+    """
+    by_key = {}
+    for sample in samples:
+        by_key.setdefault(sample["key"], []).append(sample)
+    summary = {}
+    for key, group in by_key.items():
+        times = sorted(s["ms"] for s in group)
+        summary[key] = {
+            "count": len(times),
+            "p50_ms": statistics.median(times),
+            "p95_ms": times[min(len(times) - 1, int(len(times) * 0.95))],
+            "max_ms": times[-1],
+            "bytes_per_frame": statistics.mean(s["bytes"] for s in group),
+        }
+        if "loading" in group[0]:
+            # Frames drawn before the store finished loading
+            summary[key]["loading_frames"] = sum(s["loading"] for s in group)
+    return summary
+
+
+def main() -> int:
+    """Run the benchmark and enforce the optional latency budget."""
+    parser = argparse.ArgumentParser(description="Keystroke latency benchmark for the bookmark selector")
+    parser.add_argument("--sizes", default="100,1000,10000", help="comma-separated store sizes")
+    parser.add_argument("--rows", type=int, default=40, help="terminal rows")
+    parser.add_argument("--cols", type=int, default=120, help="terminal columns")
+    parser.add_argument("--preview", action="store_true", help="enable the preview pane")
+    parser.add_argument("--timeout", type=float, default=10.0, help="seconds to wait for a frame")
+    parser.add_argument("--budget-ms", type=float, help="fail if any key class p95 exceeds this")
+    parser.add_argument("--memory", action="store_true", help="also report memory held by the loaded bookmarks")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    try:
+        import pty  # noqa: F401
+    except ImportError:
+        print("A pseudo-terminal (pty module) is required; run this on Linux or macOS.", file=sys.stderr)
+        return 2
+
+    results = {}
+    memory = {}
+    failures = []
+    for size in (int(s) for s in args.sizes.split(",") if s.strip()):
+        if args.memory:
+            memory[size] = measure_memory(size)
+        samples = run_session(size, args.rows, args.cols, args.preview, args.timeout)
+        summary = summarize(samples)
+        results[size] = summary
+        if not samples or not samples[-1]["exited"] or samples[-1]["key"] != "digit":
+            failures.append(f"size {size}: selector did not finish the scripted session")
+        for key, stats in summary.items():
+            # Startup and the final digit (process exit) are reported but not budgeted
+            if args.budget_ms is not None and key not in UNBUDGETED and stats["p95_ms"] > args.budget_ms:
+                failures.append(f"size {size}: '{key}' p95 {stats['p95_ms']:.1f} ms > {args.budget_ms:.1f} ms")
+
+    if args.json:
+        report = {"results": results, "failures": failures}
+        if args.memory:
+            report["memory"] = memory
+        print(json.dumps(report, indent=2))
+    else:
+        for size, summary in results.items():
+            print(f"Store size {size} ({args.cols}x{args.rows}{', preview' if args.preview else ''})")
+            print(f"  {'key':<12} {'n':>4} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8} {'bytes/frame':>12}")
+            for key, stats in summary.items():
+                print(
+                    f"  {key:<12} {stats['count']:>4} {stats['p50_ms']:>8.2f} {stats['p95_ms']:>8.2f}"
+                    f" {stats['max_ms']:>8.2f} {stats['bytes_per_frame']:>12.0f}"
+                )
+            if size in memory:
+                mem = memory[size]
+                print(
+                    f"  memory: {mem['tuples_kib']:.0f} KiB as tuples, {mem['table_kib']:.0f} KiB as table"
+                    f" ({mem['table_kib'] / max(mem['tuples_kib'], 1e-9):.0%})"
+                )
+        for failure in failures:
+            print(f"FAIL: {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -9,31 +9,1074 @@ Version: 3.0
 License: MIT
 """
 
+import fnmatch
 import os
 import sys
 import subprocess
 import json
 import platform
+import queue
+import shlex
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Dict, List, Tuple, Optional, Union
+from typing import Callable, Dict, Iterable, Iterator, List, Sequence, Set, Tuple, Optional, Union
+
+
+OUTPUT_FORMATS = ("json", "jsonl", "tsv", "null")
+LISTING_CACHE_SIZE = 128  # Directory listings kept for subpath completion
+HISTORY_RECORD_SIZE = 256  # Slot size of the cd-history ring buffer (see goto_function.sh)
+PROJECT_CACHE_LAYERS = 16  # Parsed project files kept in the layer cache
+NUMPY_MIN_ENTRIES = 20000  # Store size from which CandidateIndex uses NumPy
+NAME_INDEX_LOOKUPS = 3  # Name lookups on one cached view from which it gets a CandidateIndex
+PREVIEW_LINES = 6  # Height of the selector's preview pane
+PREVIEW_CACHE_SIZE = 64  # Directory previews kept while the selector is open
+PREVIEW_SCAN_LIMIT = 5000  # Entries read per directory for a preview
+USAGE_LOG_LIMIT = 1 << 20  # Bytes of usage log folded into the metadata without waiting for a save
+SYNC_SNAPSHOT_HEADER = "# Snapshot of the sync logs - edit through bookmark.py\n"
+SYNC_COMPACT_MIN = 256  # Operations a host's sync log holds before it may be compacted
+JUMPS_LIMIT = 200  # Directories kept in the merged goto jump history
+BATCH_REPORT_MIN = 1000  # Operations from which --batch reports its throughput
+METRICS_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)  # Seconds
+
+
+def _env_number(name: str) -> Optional[float]:
+    """Read a positive number from the environment; None when unset or invalid."""
+    try:
+        value = float(os.environ.get(name, ""))
+    except ValueError:
+        return None
+    return value if value > 0 else None
 
 
-class BookmarkManager:
-    def __init__(self):
-        self.bookmark_file = Path.home() / ".dir-bookmarks.txt"
-        self.current_dir = os.getcwd()
-        self.platform = platform.system().lower()
+def _cache_dir() -> Path:
+    """Directory for derived, safely-deletable cache files."""
+    base = os.environ.get("XDG_CACHE_HOME") or str(Path.home() / ".cache")
+    return Path(base) / "dir-bookmarks"
+
+
+def _atomic_write(path: Path, text: str) -> None:
+    """Replace path with text atomically, creating its directory if needed.
+
+    The text is written to a sibling <name>.<pid>.tmp that is renamed over
+    path, so readers never see a partial file; the temporary file is
+    removed if anything fails.
+
+    Raises:
+        OSError: If the file cannot be written
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_file = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_file, path)
+    finally:
+        try:
+            tmp_file.unlink()  # Only still there when the write failed
+        except OSError:
+            pass
+
+
+def _write_cache(path: Path, data: dict) -> None:
+    """Atomically write a JSON cache file, ignoring failures."""
+    try:
+        _atomic_write(path, json.dumps(data))
+    except OSError:
+        pass  # Cache is an optimisation only
+
+
+@contextmanager
+def _exclusive_lock(path: Path) -> Iterator[None]:
+    """Hold an exclusive flock on path (created if missing) for the block.
+
+    Where fcntl is unavailable (Windows) the block runs unlocked and the
+    last writer wins on a race.
+    """
+    try:
+        import fcntl
+    except ImportError:
+        fcntl = None
+    path.parent.mkdir(parents=True, exist_ok=True)
+    lock_fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        if fcntl is not None:
+            fcntl.flock(lock_fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        os.close(lock_fd)
+
+
+_store_cache = {}  # Process-wide merged views: file paths -> (stamp, view)
+_numpy_module = False  # Not imported yet; then the module or None
+
+
+def _load_numpy():
+    """Import NumPy on first use, or return None if it is unavailable.
+
+    NumPy is optional and only imported for large stores, so ordinary
+    invocations do not pay its import time. BOOKMARK_NO_NUMPY=1 disables it.
+    """
+    global _numpy_module
+    if _numpy_module is False:
+        _numpy_module = None
+        if os.environ.get("BOOKMARK_NO_NUMPY", "0") != "1":
+            try:
+                import numpy
+
+                _numpy_module = numpy
+            except ImportError:
+                pass
+    return _numpy_module
+
+
+def _byte_bit(byte: int) -> int:
+    """Bit position of a byte in a CandidateIndex character-set mask."""
+    if 97 <= byte <= 122:  # a-z
+        return byte - 97
+    if 48 <= byte <= 57:  # 0-9
+        return 26 + byte - 48
+    if byte == 10:  # Entry separator; never part of a query
+        return 63
+    return 36 + byte % 27
+
+
+class CandidateIndex:
+    """Case-insensitive substring search over (name, path) entries.
+
+    Lowercased names and paths are computed once per index instead of once
+    per query. For large stores, when NumPy is available, every entry also
+    gets a 64-bit mask of the bytes it contains: a query first keeps the
+    entries whose mask covers the query's mask with one vectorized AND and
+    compare, and the real substring test only runs on those survivors.
+    Without NumPy the same test runs over every entry. Both paths return
+    identical indices in entry order.
+    """
+
+    __slots__ = ("entries", "names", "paths", "_np", "_name_masks", "_path_masks")
+
+    def __init__(self, entries: Sequence[Tuple[str, str]], use_numpy: Optional[bool] = None):
+        """Build the index.
+
+        Args:
+            entries: (name, path) tuples; indices refer to this sequence
+            use_numpy: Force the NumPy prefilter on or off; by default it is
+                used from NUMPY_MIN_ENTRIES entries when NumPy is installed
+        """
+        self.entries = entries
+        self.names = [name.lower() for name, _ in entries]
+        self.paths = [path.lower() for _, path in entries]
+        if use_numpy is None:
+            use_numpy = len(entries) >= NUMPY_MIN_ENTRIES
+        self._np = _load_numpy() if use_numpy else None
+        if self._np is not None:
+            self._name_masks = self._masks(self.names)
+            self._path_masks = self._masks(self.paths)
+
+    def _masks(self, values: List[str]):
+        """Compute per-entry byte-set masks from one newline-joined blob."""
+        np = self._np
+        if not values:
+            return np.zeros(0, dtype=np.uint64)
+        table = np.array([1 << _byte_bit(b) for b in range(256)], dtype=np.uint64)
+        text = "\n".join(values) + "\n"
+        if text.isascii():
+            lengths = np.fromiter(map(len, values), dtype=np.int64, count=len(values))
+        else:
+            lengths = np.fromiter((len(v.encode("utf-8")) for v in values), dtype=np.int64, count=len(values))
+        starts = np.zeros(len(values), dtype=np.int64)
+        np.cumsum(lengths[:-1] + 1, out=starts[1:])
+        bits = table[np.frombuffer(text.encode("utf-8"), dtype=np.uint8)]
+        # Each segment holds an entry plus its separator, so none is empty
+        return np.bitwise_or.reduceat(bits, starts)
+
+    @staticmethod
+    def _query_mask(query: str) -> int:
+        mask = 0
+        for byte in query.encode("utf-8"):
+            mask |= 1 << _byte_bit(byte)
+        return mask
+
+    def _candidates(self, q: str, include_paths: bool) -> Iterable[int]:
+        """Entry indices that may contain q (all of them without NumPy)."""
+        if self._np is None:
+            return range(len(self.names))
+        qm = self._np.uint64(self._query_mask(q))
+        hit = (self._name_masks & qm) == qm
+        if include_paths:
+            hit |= (self._path_masks & qm) == qm
+        return self._np.flatnonzero(hit).tolist()
+
+    def search(self, query: str, include_paths: bool = True) -> List[int]:
+        """Indices of entries whose name (or path) contains query.
+
+        Args:
+            query: Substring to look for (case-insensitive)
+            include_paths: Also match against paths
+
+        Returns:
+            List[int]: Matching indices in entry order
+        """
+        q = query.lower()
+        if not q:
+            return list(range(len(self.names)))
+        names, paths = self.names, self.paths
+        candidates = self._candidates(q, include_paths)
+        if include_paths:
+            return [i for i in candidates if q in names[i] or q in paths[i]]
+        return [i for i in candidates if q in names[i]]
+
+    def exact(self, query: str) -> List[int]:
+        """Indices of entries whose name equals query (case-insensitive)."""
+        q = query.lower()
+        names = self.names
+        return [i for i in self._candidates(q, False) if names[i] == q]
+
+
+class BookmarkTable:
+    """Compact, read-only table of (name, path) bookmarks.
+
+    Paths are stored as nodes of a shared directory trie: a node is an
+    interned segment plus the index of its parent, so a prefix such as
+    /home/<user>/work is held once however many bookmarks sit below it.
+    Entries are two parallel columns, a name and a leaf node; names are
+    interned too, so a name equal to its directory's basename is stored once.
+    Indexing and iteration build (name, path) tuples on demand, so a table
+    can be passed wherever a list of tuples is read; lookups that only need
+    names should read names and index the entries they keep.
+    """
+
+    __slots__ = ("_names", "_leaves", "_parents", "_segments")
+
+    def __init__(self, entries: Iterable[Tuple[str, str]] = ()):
+        """Build the table.
+
+        Args:
+            entries: (name, path) tuples, kept in the order given
+        """
+        self._names = []
+        self._leaves = array("i")
+        self._parents = array("i")
+        self._segments = []
+        nodes = {}  # path -> node; only needed while building
+        for name, path in entries:
+            node = nodes.get(path)
+            if node is None:
+                node = self._add_node(path, nodes)
+            self._names.append(sys.intern(name))
+            self._leaves.append(node)
+
+    def _add_node(self, path: str, nodes: Dict[str, int]) -> int:
+        """Add the trie node for path, and any missing ancestors, while building.
+
+        Siblings find their parent directory with one lookup, so most
+        entries cost a single dictionary miss rather than one per segment.
+        """
+        head, sep, tail = path.rpartition("/")
+        parent = -1
+        if sep:
+            parent = nodes.get(head)
+            if parent is None:
+                parent = self._add_node(head, nodes)
+        node = nodes[path] = len(self._segments)
+        self._segments.append(sys.intern(tail))
+        self._parents.append(parent)
+        return node
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    @property
+    def names(self) -> List[str]:
+        """Entry names in table order, without building any path (read-only)."""
+        return self._names
+
+    def _path(self, node: int) -> str:
+        segments, parents = self._segments, self._parents
+        parts = []
+        while node >= 0:
+            parts.append(segments[node])
+            node = parents[node]
+        parts.reverse()
+        return "/".join(parts)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        return self._names[i], self._path(self._leaves[i])
+
+    def __iter__(self) -> Iterator[Tuple[str, str]]:
+        segments, parents = self._segments, self._parents
+        built = {}  # node -> path, so each shared prefix is joined once per pass
+        for name, node in zip(self._names, self._leaves):
+            path = built.get(node)
+            if path is None:
+                chain = []
+                while node >= 0 and node not in built:
+                    chain.append(node)
+                    node = parents[node]
+                path = built[node] if node >= 0 else None
+                for node in reversed(chain):
+                    path = segments[node] if path is None else f"{path}/{segments[node]}"
+                    built[node] = path
+            yield name, path
+
+    def take(self, indices: Iterable[int]) -> "BookmarkTable":
+        """Return a table of the given entries that shares this table's paths.
+
+        Args:
+            indices: Entry indices, in the order wanted
+
+        Returns:
+            BookmarkTable: The selected entries
+        """
+        view = BookmarkTable.__new__(BookmarkTable)
+        view._parents, view._segments = self._parents, self._segments
+        names, leaves = self._names, self._leaves
+        indices = list(indices)
+        view._names = [names[i] for i in indices]
+        view._leaves = array("i", [leaves[i] for i in indices])
+        return view
+
+    def sorted_by_name(self) -> "BookmarkTable":
+        """Return the entries sorted case-insensitively by name (stable)."""
+        keys = [name.lower() for name in self._names]
+        return self.take(sorted(range(len(keys)), key=keys.__getitem__))
+
+
+class BookmarkStore:
+    """Bookmark storage with no terminal I/O, usable as a library.
+
+    A store reads the user's file merged with the system, team and project
+    layers (or the sync logs) and edits the user's own bookmarks. The merged
+    view is cached per process and only re-read when one of its files
+    changes, so a lookup after the first costs a few stat calls:
+
+        store = BookmarkStore()
+        outcome, path, matches = store.resolve("proj/src")
+
+    Problems met while reading (malformed lines, unreadable files) are
+    collected in warnings rather than printed; failed writes raise OSError.
+    """
+
+    def __init__(self, bookmark_file: Optional[Path] = None, current_dir: Optional[str] = None):
+        """Create a store.
+
+        Args:
+            bookmark_file: User bookmark file (default ~/.dir-bookmarks.txt)
+            current_dir: Directory project bookmark files are discovered from
+                (default the working directory)
+        """
+        self.bookmark_file = Path(bookmark_file) if bookmark_file else Path.home() / ".dir-bookmarks.txt"
+        self.current_dir = current_dir or os.getcwd()
+        self.warnings: List[str] = []
+
+        # Shared read-only layers overlaid beneath the user's own file
+        self.system_bookmark_file = Path(
+            os.environ.get("BOOKMARK_SYSTEM_FILE", "/etc/dir-bookmarks.txt")
+        )
+        team_file = os.environ.get("BOOKMARK_TEAM_FILE", "")
+        self.team_bookmark_file = Path(team_file).expanduser() if team_file else None
+        self.layer_cache_file = _cache_dir() / "layers.json"
+        self.project_file_name = os.environ.get("BOOKMARK_PROJECT_FILE", ".dir-bookmarks")
+        self._project_file = False  # Not looked up yet; then Optional[Path]
+
+        # Multi-host sync: each host appends its edits to <sync_dir>/<host>.log
+        sync_dir = os.environ.get("BOOKMARK_SYNC_DIR", "")
+        self.sync_dir = Path(sync_dir).expanduser() if sync_dir else None
+        self.host = os.environ.get("BOOKMARK_HOST") or platform.node() or "localhost"
+        self._sync_observed = None  # (bookmarks, ids per path, clock) as last loaded
+        self._identity_cache = {}  # raw path -> canonical identity
+
+        # Retention for auto-added bookmarks; manually added ones are pinned
+        stem = self.bookmark_file.stem
+        self.meta_file = self.bookmark_file.with_name(f"{stem}-meta.json")
+        self.usage_file = self.bookmark_file.with_name(f"{stem}-usage.log")
+        max_auto = _env_number("BOOKMARK_MAX_AUTO")
+        self.max_auto = int(max_auto) if max_auto else None
+        ttl_days = _env_number("BOOKMARK_AUTO_TTL_DAYS")
+        self.auto_ttl = ttl_days * 86400 if ttl_days else None
+
+        # Per-host path prefix rewrites (host_glob|from|to), applied to read views only
+        rewrite_file = os.environ.get("BOOKMARK_REWRITE_FILE", "")
+        self.rewrite_file = (
+            Path(rewrite_file).expanduser() if rewrite_file else self.bookmark_file.with_name(f"{stem}-rewrite.txt")
+        )
+        self._rewrites = (None, {})  # (rules file stamp, prefix -> replacement)
+
+    def load(self) -> Dict[str, str]:
+        """Load the system, team, project and user layers merged into one view.
+
+        Higher layers win: a user bookmark overrides a project, team or system
+        bookmark for the same path or the same name. Shared layers are only
+        re-read when their mtime or size changes. Relative paths in a project
+        file are resolved against the directory holding it.
+
+        Returns:
+            Dict[str, str]: Dictionary mapping paths to bookmark names (a copy)
+        """
+        return dict(self._view()["merged"])
+
+    def get(self, name: str) -> Optional[str]:
+        """Look up a bookmark by exact name (case-insensitive).
+
+        Args:
+            name: Bookmark name
+
+        Returns:
+            Optional[str]: Path, or None unless exactly one bookmark has that name
+        """
+        matches = self._names_by_key(self._view()).get(name.lower(), [])
+        return matches[0] if len(matches) == 1 else None
+
+    def resolve(self, query: str) -> Tuple[str, Optional[str], List[Tuple[str, str]]]:
+        """Resolve a bookmark name (exact or unique partial) to a path.
+
+        A query of the form name/sub/path resolves name and appends the
+        subpath, unless the whole query is itself an exact bookmark name.
+
+        Args:
+            query: Bookmark name or partial match (case-insensitive)
+
+        Returns:
+            Tuple[str, Optional[str], List[Tuple[str, str]]]: Outcome ("exact",
+            "partial", "ambiguous" or "miss") for the name, the resolved path
+            (None unless exact or partial) and the matching (name, path) tuples
+        """
+        if not query:
+            return "miss", None, []
+        outcome, matches = self._match_bookmark_name(query)
+        if outcome != "exact" and "/" in query and not query.startswith("/"):
+            head, _, tail = query.partition("/")
+            outcome, base, matches = self.resolve(head)
+            tail = tail.lstrip("/")  # An absolute tail would replace the base
+            if base is not None and tail:
+                base = os.path.normpath(os.path.join(base, tail))
+            return outcome, base, matches
+        return outcome, matches[0][1] if outcome in ("exact", "partial") else None, matches
+
+    def iterate(self, sort: bool = True) -> Iterator[Tuple[str, str]]:
+        """Iterate over the merged bookmarks.
+
+        Args:
+            sort: Sort by name; when False entries are streamed as parsed
+
+        Returns:
+            Iterator[Tuple[str, str]]: (name, path) entries
+        """
+        return iter(self._get_sorted_bookmark_list()) if sort else self.iter_bookmarks()
+
+    def add(self, name: str, path: str, overwrite: bool = False, auto: bool = False) -> None:
+        """Bookmark a directory in the user's own file.
+
+        Args:
+            name: Bookmark name
+            path: Directory to bookmark (made absolute)
+            overwrite: Replace a bookmark with the same name, or rename the
+                directory's existing bookmark, instead of failing
+            auto: Added by a script rather than a person; subject to the
+                BOOKMARK_MAX_AUTO and BOOKMARK_AUTO_TTL_DAYS limits
+
+        Raises:
+            ValueError: If the name is invalid or already taken, the path
+                is not a directory the file can store, or the directory is
+                already bookmarked (without overwrite)
+            OSError: If the bookmarks cannot be saved
+        """
+        name = name.strip()
+        path = os.path.abspath(os.path.expanduser(path))
+        error = self._name_error(name) or self._path_error(path)
+        if error:
+            raise ValueError(error)
+        bookmarks = self.load_bookmarks()
+        existing = self._find_bookmarked_path(bookmarks, path)
+        if not overwrite:
+            if existing is not None:
+                raise ValueError(f"Directory '{path}' is already bookmarked as '{bookmarks[existing]}'")
+            if name in bookmarks.values():
+                raise ValueError(f"A bookmark with the name '{name}' already exists.")
+        bookmarks = {p: n for p, n in bookmarks.items() if n != name and p != existing}
+        bookmarks[path] = name
+        self._save(bookmarks, {path: auto})
+
+    def remove(self, name_or_path: str) -> bool:
+        """Remove a bookmark from the user's own file.
+
+        Args:
+            name_or_path: Exact bookmark name, or a path reaching the
+                bookmarked directory (symlinks and bind mounts match)
+
+        Returns:
+            bool: True if a bookmark was removed
+
+        Raises:
+            OSError: If the bookmarks cannot be saved
+        """
+        bookmarks = self.load_bookmarks()
+        paths = [p for p, n in bookmarks.items() if n == name_or_path]
+        if not paths:
+            target = os.path.abspath(os.path.expanduser(name_or_path))
+            # A miss is the rare case here, so it can afford to check differently named aliases
+            found = self._find_bookmarked_path(bookmarks, target) or self._find_bookmarked_path(
+                bookmarks, target, scan_all=True
+            )
+            paths = [found] if found is not None else []
+        if not paths:
+            return False
+        for path in paths:
+            del bookmarks[path]
+        self._save(bookmarks)
+        return True
+
+    def apply(self, operations: Iterable[Tuple]) -> Dict[str, int]:
+        """Apply several edits to the user's own file as one transaction.
+
+        Operations are ("add", name, path, auto), ("remove", name) and
+        ("rename", old, new), checked in order against a single load of the
+        bookmarks with the same rules as add() (without overwrite). Nothing
+        is written unless every operation is valid; then the result is saved
+        with one atomic write. The existing bookmarks are indexed by last
+        path component once, on the first add, so each add only stats the
+        few stored paths that could be aliases of its directory.
+
+        Args:
+            operations: Operations to apply, in order
+
+        Returns:
+            Dict[str, int]: Number of operations applied per kind
+
+        Raises:
+            ValueError: If any operation is invalid; one line per problem,
+                numbered by operation
+            OSError: If the bookmarks cannot be saved
+        """
+        bookmarks = self.load_bookmarks()
+        names = {name: path for path, name in bookmarks.items()}
+        rules = self._rewrite_rules()
+        by_leaf = None  # Last component of the local path -> stored paths (dict as ordered set)
+        added = {}
+        counts = {"add": 0, "remove": 0, "rename": 0}
+        errors = []
+        for number, operation in enumerate(operations, 1):
+            kind, error = operation[0], None
+            if kind == "add":
+                _, name, path, auto = operation
+                name = name.strip()
+                path = os.path.abspath(os.path.expanduser(path))
+                error = self._name_error(name) or self._path_error(path)
+                if error is None:
+                    if by_leaf is None:
+                        by_leaf = {}
+                        for stored in bookmarks:
+                            by_leaf.setdefault(self._leaf(self._rewrite_path(stored, rules)), {})[stored] = None
+                    existing = path if path in bookmarks else None
+                    if existing is None:
+                        identity = self._path_identity(path)
+                        existing = next(
+                            (
+                                stored
+                                for leaf in self._alias_leaves(path, identity)
+                                for stored in by_leaf.get(leaf, ())
+                                if self._same_directory(self._rewrite_path(stored, rules), identity)
+                            ),
+                            None,
+                        )
+                    if existing is not None:
+                        error = f"Directory '{path}' is already bookmarked as '{bookmarks[existing]}'"
+                    elif name in names:
+                        error = f"A bookmark with the name '{name}' already exists."
+                    else:
+                        bookmarks[path] = name
+                        names[name] = path
+                        by_leaf.setdefault(self._leaf(self._rewrite_path(path, rules)), {})[path] = None
+                        added[path] = auto
+            elif kind == "remove":
+                path = names.pop(operation[1], None)
+                if path is None:
+                    error = f"No bookmark named '{operation[1]}'."
+                else:
+                    del bookmarks[path]
+                    added.pop(path, None)
+                    if by_leaf is not None:
+                        by_leaf.get(self._leaf(self._rewrite_path(path, rules)), {}).pop(path, None)
+            elif kind == "rename":
+                _, old, new = operation
+                new = new.strip()
+                path = names.get(old)
+                if path is None:
+                    error = f"No bookmark named '{old}'."
+                else:
+                    error = self._name_error(new)
+                    if error is None and new != old and new in names:
+                        error = f"A bookmark with the name '{new}' already exists."
+                if error is None:
+                    del names[old]
+                    names[new] = path
+                    bookmarks[path] = new
+            else:
+                error = f"Unknown operation '{kind}'."
+            if error is None:
+                counts[kind] += 1
+            else:
+                errors.append(f"Operation {number} ({kind}): {error}")
+        if errors:
+            raise ValueError("\n".join(errors))
+        if any(counts.values()):
+            self._save(bookmarks, added)
+        return counts
+
+    def record_use(self, path: str) -> None:
+        """Note that a bookmarked directory was just used.
+
+        Usage only matters for auto-added bookmarks, so nothing is recorded
+        until some exist. A use is one append to the usage log; the log is
+        folded into the retention metadata at the next save.
+
+        Args:
+            path: Bookmarked path, as stored or as rewritten for this host
+                (what resolve() and iterate() return)
+        """
+        if not self.meta_file.exists():
+            return
+        # Retention metadata is keyed by the stored path, not its local form
+        stored = self._view()["stored"]
+        if stored:
+            path = stored.get(path, path)
+        try:
+            fd = os.open(self.usage_file, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, f"{int(time.time())}\t{path}\n".encode("utf-8"))
+                size = os.fstat(fd).st_size
+            finally:
+                os.close(fd)
+            if size > USAGE_LOG_LIMIT:
+                auto = self._load_meta()
+                self._fold_usage(auto)
+                self._write_meta(auto)
+        except OSError:
+            pass  # Usage tracking is advisory
+
+    def _warn(self, message: str) -> None:
+        """Record a problem met while reading bookmarks."""
+        self.warnings.append(message)
+
+    def _stamp(self) -> Tuple:
+        """Identify the current state of every file the merged view is built from."""
+        files = [self.bookmark_file, self.rewrite_file] + [f for _, f in self._shared_layers()]
+        if self.sync_dir is not None:
+            files.append(self.sync_dir)
+            try:
+                files.extend(sorted(self.sync_dir.glob("*.log")))
+            except OSError:
+                pass
+        stamp = []
+        for f in files:
+            try:
+                st = os.stat(f)
+                stamp.append((str(f), st.st_ino, st.st_mtime_ns, st.st_size))
+            except OSError:
+                stamp.append((str(f), None))
+        return tuple(stamp)
+
+    def _view(self) -> dict:
+        """Return the merged view, parsed at most once per process per file state.
+
+        Stores with the same files share one view; it must not be modified.
+        The stamp is taken before reading, so a change made during the read
+        is picked up by the next call.
+
+        Returns:
+            dict: "merged" (path -> name), "stored" (rewritten path -> path as
+            stored, or None without rewrite rules), and the lazily built "table"
+            (sorted BookmarkTable, see _get_sorted_bookmark_list), "names"
+            lookup and name "index" (see _match_bookmark_name), so a one-shot
+            lookup never pays for the table
+        """
+        stamp = self._stamp()
+        key = tuple(entry[0] for entry in stamp)
+        cached = _store_cache.get(key)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+        merged = self._merge_layers()
+        rules = self._rewrite_rules()
+        stored = None
+        if rules:
+            rewritten, stored = {}, {}
+            for path, name in merged.items():
+                local = self._rewrite_path(path, rules)
+                rewritten[local] = name
+                if local != path:
+                    stored[local] = path
+            merged = rewritten
+        view = {"merged": merged, "stored": stored, "table": None, "names": None, "index": None, "lookups": 0}
+        _store_cache[key] = (stamp, view)
+        return view
+
+    @staticmethod
+    def _names_by_key(view: dict) -> Dict[str, List[str]]:
+        """Map lowercased names to their paths for a view."""
+        if view["names"] is None:
+            names = {}
+            for path, name in view["merged"].items():
+                names.setdefault(name.lower(), []).append(path)
+            view["names"] = names
+        return view["names"]
+
+    def _save(self, bookmarks: Dict[str, str], added: Optional[Dict[str, bool]] = None) -> None:
+        """Write the user's bookmarks, through the sync logs when enabled.
+
+        Auto-added bookmarks over the retention limits are evicted first.
+
+        Args:
+            bookmarks: Dictionary mapping paths to bookmark names
+            added: Paths just added, mapped to whether they were added
+                automatically (a manual add pins a path)
+
+        Raises:
+            OSError: If a file cannot be written
+        """
+        auto = self._apply_retention(bookmarks, added or {})
+        if self.sync_dir is not None:
+            # The delta logs are authoritative; the file below is a snapshot
+            self._append_sync_ops(bookmarks)
+            bookmarks = self.load_bookmarks()
+
+        self._write_bookmark_file(self.bookmark_file, bookmarks, snapshot=self.sync_dir is not None)
+        if auto is not None:
+            self._write_meta(auto)
+
+    def _apply_retention(self, bookmarks: Dict[str, str], added: Dict[str, bool]) -> Optional[OrderedDict]:
+        """Update auto-added bookmark metadata and evict entries over the limits.
+
+        Auto entries are kept in least-recently-used order, so the ones over
+        BOOKMARK_MAX_AUTO and the ones unused for BOOKMARK_AUTO_TTL_DAYS are
+        always at the front: eviction pops from there and stops at the first
+        entry it keeps, without scanning the rest of the store.
+
+        Args:
+            bookmarks: Bookmarks about to be saved; evicted paths are removed
+            added: Paths just added, mapped to whether they were added automatically
+
+        Returns:
+            Optional[OrderedDict]: Metadata to write, or None when no auto
+            bookmarks are involved
+        """
+        if not any(added.values()) and not self.meta_file.exists():
+            return None
+        auto = self._load_meta()
+        self._fold_usage(auto)
+        now = int(time.time())
+        for path, is_auto in added.items():
+            auto.pop(path, None)
+            if is_auto:
+                auto[path] = [now, now]
+        for path in [p for p in auto if p not in bookmarks]:
+            del auto[path]  # Removed by other means
+
+        evicted = []
+        while auto:
+            path, (_, last_used) = next(iter(auto.items()))
+            over = self.max_auto is not None and len(auto) > self.max_auto
+            expired = self.auto_ttl is not None and now - last_used > self.auto_ttl
+            if not (over or expired):
+                break
+            auto.popitem(last=False)
+            evicted.append(path)
+            del bookmarks[path]
+        if evicted:
+            self._warn(f"Evicted {len(evicted)} auto-added bookmark(s) over the capacity or age limit.")
+        return auto
+
+    def _load_meta(self) -> OrderedDict:
+        """Read auto-added bookmark metadata: path -> [added, last used], LRU first."""
+        try:
+            with open(self.meta_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == 1:
+                return OrderedDict((path, [added, used]) for path, added, used in data.get("auto", []))
+        except (OSError, ValueError, TypeError):
+            pass
+        return OrderedDict()
+
+    def _write_meta(self, auto: OrderedDict) -> None:
+        """Atomically write auto-added bookmark metadata (removed when empty)."""
+        if not auto:
+            try:
+                self.meta_file.unlink()
+            except OSError:
+                pass
+            return
+        entries = [[path, added, used] for path, (added, used) in auto.items()]
+        _atomic_write(self.meta_file, json.dumps({"version": 1, "auto": entries}))
+
+    def _fold_usage(self, auto: OrderedDict) -> None:
+        """Move auto entries used since the last fold to the back of the LRU order.
+
+        The log is renamed before reading, so uses appended meanwhile land
+        in a fresh log for the next fold.
+        """
+        folding = self.usage_file.with_name(f"{self.usage_file.name}.{os.getpid()}.fold")
+        try:
+            os.replace(self.usage_file, folding)
+        except OSError:
+            return
+        try:
+            with open(folding, "r", encoding="utf-8", errors="replace") as f:
+                for line in f:
+                    stamp, sep, path = line.rstrip("\n").partition("\t")
+                    if sep and stamp.isdigit() and path in auto:
+                        entry = auto.pop(path)
+                        entry[1] = max(entry[1], int(stamp))
+                        auto[path] = entry
+        except OSError:
+            pass
+        finally:
+            try:
+                folding.unlink()
+            except OSError:
+                pass
 
     def load_bookmarks(self) -> Dict[str, str]:
-        """Load existing bookmarks from file.
+        """Load existing bookmarks from the user's own file.
+
+        With BOOKMARK_SYNC_DIR set, the user's bookmarks are the merge of
+        every host's delta log instead.
         
         Returns:
             Dict[str, str]: Dictionary mapping paths to bookmark names
         """
-        bookmarks = {}
-        if self.bookmark_file.exists():
+        if self.sync_dir is not None:
+            host_log = self._host_log()
+            if not host_log.exists():
+                try:
+                    self._seed_sync_log(host_log)
+                except OSError as e:
+                    self._warn(f"Warning: Could not start sync log {host_log}: {e}")
+            bookmarks, ids, clock = self._load_sync_state()
+            self._sync_observed = (dict(bookmarks), ids, clock)
+            return bookmarks
+        return self._parse_bookmark_file(self.bookmark_file)
+
+    def _load_sync_state(self) -> Tuple[Dict[str, str], Dict[str, List[str]], int]:
+        """Merge all host delta logs in the sync directory.
+
+        Each log line is an operation tagged with a unique id and a Lamport
+        clock:
+
+            A<TAB>id<TAB>clock<TAB>host<TAB>name<TAB>path   add / rename
+            R<TAB>id<TAB>clock<TAB>host<TAB>id1,id2,...     remove observed adds
+            S<TAB>id<TAB>clock<TAB>host                     compacted log start
+
+        An add is live unless some remove lists its id (observed-remove set),
+        so concurrent adds survive concurrent removes. When several live adds
+        share a path, the highest (clock, host, id) names it. The merge is a
+        single pass over all logs and does not depend on file order.
+
+        Returns:
+            Tuple[Dict[str, str], Dict[str, List[str]], int]: Bookmarks, live add
+            ids per path and the highest clock seen
+        """
+        adds = {}
+        removed = set()
+        clock = 0
+        try:
+            logs = sorted(self.sync_dir.glob("*.log"))
+        except OSError:
+            logs = []
+        for log in logs:
             try:
-                with open(self.bookmark_file, "r", encoding="utf-8") as f:
+                for op in self._read_sync_ops(log):
+                    op_clock = int(op[2])
+                    if op[0] == "A":
+                        adds[op[1]] = (op_clock, op[3], op[4], op[5])
+                    elif op[0] == "R":
+                        removed.update(op[4].split(","))
+                    clock = max(clock, op_clock)
+            except (OSError, UnicodeDecodeError) as e:
+                self._warn(f"Warning: Skipping sync log {log}: {e}")
+
+        winners = {}
+        ids = {}
+        for op_id, (op_clock, host, name, path) in adds.items():
+            if op_id in removed:
+                continue
+            ids.setdefault(path, []).append(op_id)
+            version = (op_clock, host, op_id)
+            if path not in winners or version > winners[path][0]:
+                winners[path] = (version, name)
+        return {path: name for path, (_, name) in winners.items()}, ids, clock
+
+    @staticmethod
+    def _read_sync_ops(log: Path) -> Iterator[Tuple[str, ...]]:
+        """Yield the well-formed operations of one delta log as field tuples.
+
+        Torn and foreign lines are skipped.
+
+        Raises:
+            OSError, UnicodeDecodeError: If the log cannot be read
+        """
+        with open(log, "r", encoding="utf-8") as f:
+            for line in f:
+                fields = tuple(line.rstrip("\n").split("\t"))
+                if len(fields) < 4 or not fields[2].isdigit():
+                    continue
+                if (
+                    (fields[0] == "A" and len(fields) == 6 and fields[4] and fields[5])
+                    or (fields[0] == "R" and len(fields) == 5)
+                    or (fields[0] == "S" and len(fields) == 4)
+                ):
+                    yield fields
+
+    def _host_log(self) -> Path:
+        """This host's delta log in the sync directory."""
+        return self.sync_dir / f"{self.host.replace(os.sep, '_')}.log"
+
+    def _seed_sync_log(self, host_log: Path) -> None:
+        """Start this host's delta log from the bookmark file.
+
+        Without this, setting BOOKMARK_SYNC_DIR would hide the bookmarks
+        already in the file, and the first save would overwrite the file
+        with the logs' state. Paths the logs do not hold yet are written as
+        adds; the log is created even when there are none, so this runs
+        once per host. A file that is itself a snapshot of the logs is not
+        seeded, as it may still hold bookmarks removed since.
+
+        Args:
+            host_log: This host's log, which does not exist yet
+        """
+        self.sync_dir.mkdir(parents=True, exist_ok=True)
+        with _exclusive_lock(Path(f"{host_log}.lock")):
+            if host_log.exists():
+                return  # Seeded by a concurrent process
+            existing = {}
+            if not self._is_sync_snapshot(self.bookmark_file):
+                existing = self._parse_bookmark_file(self.bookmark_file)
+            state, _, clock = self._load_sync_state()
+            ops = []
+            for path, name in existing.items():
+                if path not in state:
+                    clock += 1
+                    ops.append(f"A\t{os.urandom(8).hex()}\t{clock}\t{self.host}\t{name}\t{path}\n")
+            _atomic_write(host_log, "".join(ops))
+
+    @staticmethod
+    def _is_sync_snapshot(bookmark_file: Path) -> bool:
+        """Whether a bookmark file's header marks it as a snapshot of the sync logs."""
+        try:
+            with open(bookmark_file, "r", encoding="utf-8") as f:
+                for line in f:
+                    if not line.startswith("#"):
+                        return False
+                    if line == SYNC_SNAPSHOT_HEADER:
+                        return True
+        except (OSError, UnicodeDecodeError):
+            pass  # Unreadable files are reported when they are parsed
+        return False
+
+    def _compact_sync_log(self, host_log: Path) -> None:
+        """Rewrite this host's delta log without dead operations once they dominate it.
+
+        Adds removed by any host are dead, and so are the ids in this host's
+        removes whose adds no other log holds. Ids are never reused, so an
+        add that is gone stays gone and dropping references to it is safe.
+        The rewritten log starts with an S line carrying the host's highest
+        clock, so later operations still order after the dropped ones. The
+        caller holds the host log's lock.
+
+        Args:
+            host_log: This host's log
+        """
+        try:
+            own = list(self._read_sync_ops(host_log))
+            if len(own) < SYNC_COMPACT_MIN:
+                return
+            other_adds = set()
+            removed = set()
+            for log in self.sync_dir.glob("*.log"):
+                for op in own if log == host_log else self._read_sync_ops(log):
+                    if op[0] == "A" and log != host_log:
+                        other_adds.add(op[1])
+                    elif op[0] == "R":
+                        removed.update(op[4].split(","))
+        except (OSError, UnicodeDecodeError):
+            return  # Only compact with a complete picture of every log
+
+        kept = []
+        for op in own:
+            if op[0] == "A" and op[1] not in removed:
+                kept.append(op)
+            elif op[0] == "R":
+                ids = [op_id for op_id in op[4].split(",") if op_id in other_adds]
+                if ids:
+                    kept.append(op[:4] + (",".join(ids),))
+        if len(kept) * 2 > len(own):
+            return
+        clock = max(int(op[2]) for op in own)
+        lines = [f"S\t{os.urandom(8).hex()}\t{clock}\t{self.host}\n"]
+        lines.extend("\t".join(op) + "\n" for op in kept)
+        _atomic_write(host_log, "".join(lines))
+
+    def _append_sync_ops(self, bookmarks: Dict[str, str]) -> None:
+        """Append the difference between the last loaded state and bookmarks
+        to this host's delta log.
+
+        Args:
+            bookmarks: Desired bookmarks (paths to names)
+        """
+        if self._sync_observed is None:
+            self.load_bookmarks()
+        observed, ids, clock = self._sync_observed
+
+        ops = []
+        for path in observed:
+            if path not in bookmarks or bookmarks[path] != observed[path]:
+                clock += 1
+                ops.append(f"R\t{os.urandom(8).hex()}\t{clock}\t{self.host}\t{','.join(ids[path])}")
+        for path, name in bookmarks.items():
+            if observed.get(path) != name:
+                clock += 1
+                ops.append(f"A\t{os.urandom(8).hex()}\t{clock}\t{self.host}\t{name}\t{path}")
+        if not ops:
+            return
+
+        host_log = self._host_log()
+        if not host_log.exists():
+            self._seed_sync_log(host_log)
+        # Writers on one host serialise on the log's lock, as compaction replaces it
+        with _exclusive_lock(Path(f"{host_log}.lock")):
+            fd = os.open(host_log, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, ("\n".join(ops) + "\n").encode("utf-8"))
+            finally:
+                os.close(fd)
+            self._compact_sync_log(host_log)
+
+    def _parse_bookmark_file(self, bookmark_file: Path) -> Dict[str, str]:
+        """Parse a name|path bookmark file.
+
+        Args:
+            bookmark_file: File to read
+
+        Returns:
+            Dict[str, str]: Dictionary mapping paths to bookmark names
+        """
+        return {path: name for name, path in self._iter_bookmark_file(bookmark_file)}
+
+    def _iter_bookmark_file(self, bookmark_file: Path) -> Iterator[Tuple[str, str]]:
+        """Stream (name, path) entries from a name|path bookmark file in file order.
+
+        Args:
+            bookmark_file: File to read
+
+        Yields:
+            Tuple[str, str]: (name, path) for every valid line
+        """
+        if bookmark_file.exists():
+            try:
+                with open(bookmark_file, "r", encoding="utf-8") as f:
                     for line_num, line in enumerate(f, 1):
                         line = line.strip()
                         if not line or line.startswith("#") or "|" not in line:
@@ -41,61 +1084,657 @@ class BookmarkManager:
                         
                         # Validate line format
                         if line.count("|") != 1:
-                            print(f"Warning: Skipping invalid line {line_num} in bookmarks file", file=sys.stderr)
+                            self._warn(f"Warning: Skipping invalid line {line_num} in bookmarks file")
                             continue
                             
                         name, path = line.split("|", 1)
                         if name.strip() and path.strip():
-                            bookmarks[path.strip()] = name.strip()
+                            yield name.strip(), path.strip()
                         else:
-                            print(f"Warning: Skipping empty name or path on line {line_num}", file=sys.stderr)
+                            self._warn(f"Warning: Skipping empty name or path on line {line_num}")
             except PermissionError:
-                print(f"Error: Permission denied reading {self.bookmark_file}", file=sys.stderr)
+                self._warn(f"Error: Permission denied reading {bookmark_file}")
             except UnicodeDecodeError as e:
-                print(f"Error: File encoding issue in {self.bookmark_file}: {e}", file=sys.stderr)
+                self._warn(f"Error: File encoding issue in {bookmark_file}: {e}")
             except Exception as e:
-                print(f"Error reading bookmarks: {e}", file=sys.stderr)
-        return bookmarks
+                self._warn(f"Error reading bookmarks: {e}")
 
-    def save_bookmarks(self, bookmarks: Dict[str, str]) -> bool:
+    def iter_bookmarks(self) -> Iterator[Tuple[str, str]]:
+        """Stream (name, path) entries of the merged view, unsorted.
+
+        When only the user file is in play it is read lazily line by line;
+        otherwise the cached merged view is iterated.
+
+        Yields:
+            Tuple[str, str]: (name, path) entries
+        """
+        if self.sync_dir is None and not any(f.exists() for _, f in self._shared_layers()):
+            rules = self._rewrite_rules()
+            for name, path in self._iter_bookmark_file(self.bookmark_file):
+                yield name, self._rewrite_path(path, rules)
+        else:
+            for path, name in self._view()["merged"].items():
+                yield name, path
+
+    def _shared_layers(self) -> List[Tuple[str, Path]]:
+        """Return the read-only layers, lowest precedence first."""
+        layers = [("system", self.system_bookmark_file)]
+        if self.team_bookmark_file is not None:
+            layers.append(("team", self.team_bookmark_file))
+        project_file = self._find_project_file()
+        if project_file is not None:
+            layers.append((f"project:{project_file}", project_file))
+        return layers
+
+    def _find_project_file(self) -> Optional[Path]:
+        """Find the nearest project bookmark file at or above current_dir.
+
+        Works like .git discovery: one stat per directory up to the nearest
+        file or the root, remembered for the life of the instance. The walk
+        is not cached across runs, as validating a cached result would need
+        the same stats.
+
+        Returns:
+            Optional[Path]: Project bookmark file, or None
+        """
+        if self._project_file is not False:
+            return self._project_file
+
+        found = None
+        directory = self.current_dir
+        while True:
+            candidate = os.path.join(directory, self.project_file_name)
+            if os.path.isfile(candidate):
+                found = Path(candidate)
+                break
+            parent = os.path.dirname(directory)
+            if parent == directory:
+                break
+            directory = parent
+
+        self._project_file = found
+        return found
+
+    def _load_shared_layer(self, layer: str, layer_file: Path, cache: dict) -> Tuple[Dict[str, str], bool]:
+        """Load one shared layer, reusing cached entries while its mtime is unchanged.
+
+        Args:
+            layer: Layer name (cache key)
+            layer_file: Bookmark file backing the layer
+            cache: Parsed layer cache, updated in place
+
+        Returns:
+            Tuple[Dict[str, str], bool]: Layer bookmarks and whether the cache changed
+        """
+        try:
+            st = layer_file.stat()
+        except OSError:
+            return {}, cache.pop(layer, None) is not None
+
+        stamp = [str(layer_file), st.st_mtime_ns, st.st_size]
+        cached = cache.get(layer)
+        if cached and cached.get("stamp") == stamp:
+            return {path: name for name, path in cached.get("entries", [])}, False
+
+        bookmarks = self._parse_bookmark_file(layer_file)
+        cache[layer] = {"stamp": stamp, "entries": [[name, path] for path, name in bookmarks.items()]}
+        return bookmarks, True
+
+    def _merge_layers(self) -> Dict[str, str]:
+        """Read the system, team, project and user layers and merge them (uncached).
+
+        Returns:
+            Dict[str, str]: Dictionary mapping paths to bookmark names
+        """
+        shared = [(layer, f) for layer, f in self._shared_layers() if f.exists()]
+        if not shared:
+            return self.load_bookmarks()
+
+        cache = {}
+        try:
+            with open(self.layer_cache_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == 1:
+                cache = data.get("layers", {})
+        except (OSError, ValueError):
+            pass
+
+        dirty = False
+        layers = []
+        for layer, layer_file in shared:
+            bookmarks, changed = self._load_shared_layer(layer, layer_file, cache)
+            if layer.startswith("project:"):
+                root = layer_file.parent
+                bookmarks = {
+                    os.path.normpath(os.path.join(root, os.path.expanduser(path))): name
+                    for path, name in bookmarks.items()
+                }
+            layers.append(bookmarks)
+            dirty = dirty or changed
+        # Keep recently used project layers cached; drop layers no longer configured
+        active = {layer for layer, _ in shared}
+        projects = [layer for layer in cache if layer.startswith("project:") and layer not in active]
+        for stale in [layer for layer in cache if layer not in active and not layer.startswith("project:")] + projects[
+            : max(len(projects) - PROJECT_CACHE_LAYERS, 0)
+        ]:
+            del cache[stale]
+            dirty = True
+        layers.append(self.load_bookmarks())
+
+        if dirty:
+            _write_cache(self.layer_cache_file, {"version": 1, "layers": cache})
+
+        merged = {}
+        for level, bookmarks in enumerate(layers):
+            if level:
+                # A higher layer's name shadows the same name from lower layers
+                names = set(bookmarks.values())
+                merged = {path: name for path, name in merged.items() if name not in names}
+            merged.update(bookmarks)
+        return merged
+
+    def _write_bookmark_file(self, target: Path, bookmarks: Dict[str, str], snapshot: bool = False) -> None:
+        """Atomically write bookmarks in name|path format.
+
+        The file is written next to target and renamed over it, so readers
+        never see a partially written file.
+
+        Args:
+            target: File to write
+            bookmarks: Dictionary mapping paths to bookmark names
+            snapshot: Mark the file as a snapshot of the sync logs, so it is
+                never seeded back into them
+        """
+        # Header comment, then bookmarks sorted by name for consistent output
+        lines = [
+            "# Directory Bookmarks - Format: name|path\n",
+            f"# Generated by Bookmark Manager v3.0 on {platform.node()}\n",
+        ]
+        if snapshot:
+            lines.append(SYNC_SNAPSHOT_HEADER)
+        lines.append("\n")
+        lines.extend(f"{name}|{path}\n" for path, name in sorted(bookmarks.items(), key=lambda x: x[1].lower()))
+        _atomic_write(target, "".join(lines))
+
+    def _path_identity(self, raw_path: str) -> Tuple:
+        """Return a canonical identity for a path, cached per raw string.
+
+        Existing paths are identified by (st_dev, st_ino), so symlinks and
+        bind mounts of one directory compare equal; missing paths fall back
+        to their realpath.
+
+        Args:
+            raw_path: Path as stored or typed
+
+        Returns:
+            Tuple: ("inode", dev, ino) or ("path", realpath)
+        """
+        identity = self._identity_cache.get(raw_path)
+        if identity is None:
+            path = os.path.expanduser(raw_path)
+            try:
+                # stat follows symlinks itself; realpath is only needed for missing paths
+                st = os.stat(path)
+                identity = ("inode", st.st_dev, st.st_ino)
+            except OSError:
+                identity = ("path", os.path.realpath(path))
+            self._identity_cache[raw_path] = identity
+        return identity
+
+    def _find_bookmarked_path(self, bookmarks: Dict[str, str], target: str, scan_all: bool = False) -> Optional[str]:
+        """Find the stored path that refers to the same directory as target.
+
+        Only stored paths whose last component matches the target's, as
+        typed or resolved, are stat'ed: that covers symlinked parents, and
+        links and bind mounts named like what they point at, without
+        touching every stored path. A stored alias under another name is
+        only found with scan_all, which compares every stored path.
+
+        Args:
+            bookmarks: Dictionary mapping paths to bookmark names
+            target: Path to look up
+            scan_all: Compare against every stored path
+
+        Returns:
+            Optional[str]: Stored path (key of bookmarks), or None
+        """
+        if target in bookmarks:
+            return target
+        identity = self._path_identity(target)
+        # str.endswith with a tuple keeps the filter over every stored path cheap
+        suffixes = tuple(os.sep + leaf + end for leaf in self._alias_leaves(target, identity) for end in ("", os.sep))
+        rules = self._rewrite_rules()
+        for path in bookmarks:
+            # A path stored under another host's mount root matches its local form
+            local = self._rewrite_path(path, rules) if rules else path
+            if (scan_all or local.endswith(suffixes)) and self._same_directory(local, identity):
+                return path
+        return None
+
+    @staticmethod
+    def _leaf(path: str) -> str:
+        """Last component of a path, ignoring trailing separators."""
+        return path.rstrip(os.sep).rpartition(os.sep)[2]
+
+    def _alias_leaves(self, target: str, identity: Tuple) -> Set[str]:
+        """Last components of target as typed and resolved, which its likely aliases share."""
+        real = identity[1] if identity[0] == "path" else os.path.realpath(os.path.expanduser(target))
+        return {self._leaf(target), self._leaf(real)}
+
+    def _same_directory(self, raw_path: str, identity: Tuple) -> bool:
+        """Whether raw_path has the given identity (see _path_identity).
+
+        Only an existing path can share an inode, so for an inode identity
+        this is one stat and missing paths are never resolved.
+        """
+        if identity[0] == "path":
+            return self._path_identity(raw_path) == identity
+        try:
+            st = os.stat(os.path.expanduser(raw_path))
+        except OSError:
+            return False
+        return st.st_ino == identity[2] and st.st_dev == identity[1]
+
+    def _rewrite_rules(self) -> Dict[str, str]:
+        """Compile the rewrite rules that apply to this host into a prefix map.
+
+        Each line of the rules file is host_glob|from|to. Rules whose glob
+        matches this host (case-insensitively) map the directory prefix from
+        to to; for a repeated from, the first rule wins. The map is rebuilt
+        only when the rules file changes.
+
+        Returns:
+            Dict[str, str]: Normalised source prefix -> replacement prefix
+        """
+        try:
+            st = os.stat(self.rewrite_file)
+            stamp = (st.st_ino, st.st_mtime_ns, st.st_size)
+        except OSError:
+            stamp = None
+        if stamp == self._rewrites[0]:
+            return self._rewrites[1]
+
+        rules = {}
+        host = self.host.lower()
+        if stamp is not None:
+            try:
+                with open(self.rewrite_file, "r", encoding="utf-8") as f:
+                    for line_num, line in enumerate(f, 1):
+                        line = line.strip()
+                        if not line or line.startswith("#"):
+                            continue
+                        parts = [part.strip() for part in line.split("|")]
+                        if len(parts) != 3 or not all(parts):
+                            self._warn(f"Warning: Skipping invalid line {line_num} in {self.rewrite_file}")
+                            continue
+                        host_glob, source, target = parts
+                        if fnmatch.fnmatchcase(host, host_glob.lower()):
+                            source = os.path.normpath(os.path.expanduser(source))
+                            rules.setdefault(source, os.path.normpath(os.path.expanduser(target)))
+            except (OSError, UnicodeDecodeError) as e:
+                self._warn(f"Error reading rewrite rules: {e}")
+        self._rewrites = (stamp, rules)
+        return rules
+
+    @staticmethod
+    def _match_rewrite(path: str, rules: Dict[str, str]) -> Optional[str]:
+        """Return the longest rule prefix covering path, or None.
+
+        Ancestors are tried from the path itself upwards, so the first hit
+        is the longest match and the cost is one dict lookup per level.
+        """
+        prefix = path
+        while True:
+            if prefix in rules:
+                return prefix
+            parent = os.path.dirname(prefix)
+            if parent == prefix or not parent:
+                return None
+            prefix = parent
+
+    @classmethod
+    def _rewrite_path(cls, path: str, rules: Dict[str, str]) -> str:
+        """Apply the longest matching rewrite rule to path.
+
+        Args:
+            path: Stored path
+            rules: Prefix map from _rewrite_rules
+
+        Returns:
+            str: Path with its prefix replaced, or path itself when no rule applies
+        """
+        if not rules:
+            return path
+        prefix = cls._match_rewrite(path, rules)
+        if prefix is None:
+            return path
+        rest = path[len(prefix) :].lstrip("/")
+        return os.path.join(rules[prefix], rest) if rest else rules[prefix]
+
+    def rewrite_report(self) -> dict:
+        """Check every bookmark against this host's path rewrite rules.
+
+        Directories are checked in parallel, as they may sit on slow network
+        mounts.
+
+        Returns:
+            dict: "rules" (source prefix -> replacement) that apply on this
+            host, "entries" as (name, stored path, local path, exists)
+            tuples sorted by name, and "unused" rule prefixes that match no
+            bookmark
+        """
+        from concurrent.futures import ThreadPoolExecutor
+
+        rules = self._rewrite_rules()
+        entries = []
+        used = set()
+        for path, name in sorted(self._merge_layers().items(), key=lambda x: x[1].lower()):
+            prefix = self._match_rewrite(path, rules)
+            if prefix is not None:
+                used.add(prefix)
+            entries.append((name, path, self._rewrite_path(path, rules)))
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            found = list(pool.map(os.path.isdir, [local for _, _, local in entries]))
+        return {
+            "rules": rules,
+            "entries": [entry + (exists,) for entry, exists in zip(entries, found)],
+            "unused": sorted(set(rules) - used),
+        }
+
+    def _get_sorted_bookmark_list(self) -> BookmarkTable:
+        """Get bookmarks sorted by name as a compact table of (name, path) entries.
+
+        The table is shared by the process-wide cache and must not be modified.
+        
+        Returns:
+            BookmarkTable: Sorted (name, path) entries
+        """
+        view = self._view()
+        if view["table"] is None:
+            view["table"] = BookmarkTable((name, path) for path, name in view["merged"].items()).sorted_by_name()
+        return view["table"]
+
+    def _match_bookmark_name(
+        self, query: str, bookmark_list: Optional[Sequence[Tuple[str, str]]] = None
+    ) -> Tuple[str, List[Tuple[str, str]]]:
+        """Match a bookmark name without printing anything.
+
+        Against the cached view, the first lookups are one pass over the
+        names, which is all a one-shot command needs. From the
+        NAME_INDEX_LOOKUPS-th lookup on an unchanged view (a long-lived
+        library caller), the view's sorted table gets a CandidateIndex and
+        later lookups use it.
+
+        Args:
+            query: Bookmark name or partial match (case-insensitive)
+            bookmark_list: (name, path) tuples to search; the cached view when omitted
+
+        Returns:
+            Tuple[str, List[Tuple[str, str]]]: Outcome ("exact", "partial",
+            "ambiguous" or "miss") and the matching (name, path) tuples
+        """
+        index = None
+        if bookmark_list is None:
+            view = self._view()
+            view["lookups"] += 1
+            if view["lookups"] >= NAME_INDEX_LOOKUPS and view["index"] is None:
+                view["index"] = CandidateIndex(self._get_sorted_bookmark_list())
+            index = view["index"]
+            # One pass over the cached name map; only the matches get sorted
+            entries = zip(view["merged"].values(), view["merged"].keys())
+        else:
+            entries = bookmark_list
+        if index is not None:
+            # The index is over the sorted table, so its matches are already in name order
+            exact = [index.entries[i] for i in index.exact(query)]
+            if len(exact) == 1:
+                return "exact", exact
+            partial = [index.entries[i] for i in index.search(query, include_paths=False)]
+        else:
+            q = query.lower()
+            exact, partial = [], []
+            for name, path in entries:
+                lowered = name.lower()
+                if q in lowered:
+                    partial.append((name, path))
+                    if lowered == q:
+                        exact.append((name, path))
+            if len(exact) == 1:
+                return "exact", exact
+            partial.sort(key=lambda x: x[0].lower())
+        if len(partial) == 1:
+            return "partial", partial
+        if len(partial) > 1:
+            return "ambiguous", partial
+        return "miss", []
+
+    @staticmethod
+    def _name_error(friendly_name: str) -> Optional[str]:
+        """Validate a bookmark name.
+
+        Args:
+            friendly_name: Stripped name to check
+
+        Returns:
+            Optional[str]: Error message, or None if the name is valid
+        """
+        if not friendly_name:
+            return "Please enter a valid name."
+
+        # Basic validation
+        if len(friendly_name) > 100:
+            return "Name too long. Please use a shorter name."
+
+        # Check for invalid characters for file paths
+        invalid_chars = ['<', '>', ':', '"', '|', '?', '*', '\t', '\n']
+        if any(char in friendly_name for char in invalid_chars):
+            return "Name contains invalid characters. Please use a different name."
+        return None
+
+    @staticmethod
+    def _path_error(path: str) -> Optional[str]:
+        """Validate a directory to bookmark.
+
+        The bookmark file and the sync logs cannot store a '|', tab or line
+        break in a path.
+
+        Args:
+            path: Absolute path to check
+
+        Returns:
+            Optional[str]: Error message, or None if the path is valid
+        """
+        if any(char in path for char in "|\t\n"):
+            return f"Path contains '|', a tab or a line break: {path!r}"
+        if not os.path.isdir(path):
+            return f"Not a directory: {path}"
+        return None
+
+
+class Metrics:
+    """Counters and latency histograms aggregated in a Prometheus textfile.
+
+    Samples are collected in memory during one invocation and added to the
+    totals already in the file on flush(), so the file accumulates across
+    runs and node-exporter's textfile collector can scrape it. Writers take
+    an exclusive flock on a sibling .lock file (where fcntl exists) and
+    replace the file atomically, so concurrent invocations never lose
+    updates and the scraper never reads a partial file.
+    """
+
+    FAMILIES = {
+        "bookmark_invocations_total": ("counter", "Invocations of bookmark.py by command."),
+        "bookmark_lookups_total": ("counter", "Bookmark name lookups by outcome."),
+        "bookmark_saves_total": ("counter", "Writes of the user bookmark file by result."),
+        "bookmark_store_entries": ("gauge", "Bookmarks in the merged view when last loaded."),
+        "bookmark_lookup_duration_seconds": ("histogram", "Time to resolve a bookmark name."),
+        "bookmark_command_duration_seconds": ("histogram", "Wall time of a bookmark.py command."),
+    }
+
+    def __init__(self, path: Optional[Path] = None):
+        """Create a recorder.
+
+        Args:
+            path: Textfile to aggregate into; nothing is written when None
+        """
+        self.path = path
+        self.counters = {}  # (sample name, labels) -> increment
+        self.gauges = {}  # (sample name, labels) -> latest value
+
+    def inc(self, name: str, labels: str = "", value: float = 1) -> None:
+        """Add value to a counter series; labels look like 'outcome="exact"'."""
+        key = (name, labels)
+        self.counters[key] = self.counters.get(key, 0) + value
+
+    def set(self, name: str, labels: str = "", value: float = 0) -> None:
+        """Set a gauge series."""
+        self.gauges[(name, labels)] = value
+
+    def observe(self, name: str, labels: str, seconds: float) -> None:
+        """Record one observation in a histogram.
+
+        Args:
+            name: Histogram family name
+            labels: Series labels, without le
+            seconds: Observed duration
+        """
+        sep = "," if labels else ""
+        for bound in METRICS_BUCKETS:
+            # Every bucket is written, even when empty, as Prometheus expects
+            self.inc(f"{name}_bucket", f'{labels}{sep}le="{bound}"', 1 if seconds <= bound else 0)
+        self.inc(f"{name}_bucket", f'{labels}{sep}le="+Inf"')
+        self.inc(f"{name}_sum", labels, seconds)
+        self.inc(f"{name}_count", labels)
+
+    def flush(self) -> None:
+        """Merge this invocation's samples into the textfile (best effort)."""
+        if self.path is None or not (self.counters or self.gauges):
+            return
+        try:
+            # Lock a sibling file: the textfile itself is replaced on every write
+            with _exclusive_lock(Path(f"{self.path}.lock")):
+                totals = self._read()
+                for key, value in self.counters.items():
+                    totals[key] = totals.get(key, 0) + value
+                totals.update(self.gauges)
+                _atomic_write(self.path, self._format(totals))
+        except OSError:
+            pass  # Metrics must never break the command itself
+        self.counters.clear()
+        self.gauges.clear()
+
+    def _read(self) -> Dict[Tuple[str, str], float]:
+        """Parse the samples currently in the textfile."""
+        totals = {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line or line.startswith("#"):
+                        continue
+                    series, _, value = line.rpartition(" ")
+                    name, _, labels = series.partition("{")
+                    try:
+                        totals[(name, labels[:-1])] = float(value)
+                    except ValueError:
+                        continue
+        except OSError:
+            pass
+        return totals
+
+    def _format(self, totals: Dict[Tuple[str, str], float]) -> str:
+        """Render samples in the Prometheus text exposition format."""
+
+        def order(key: Tuple[str, str]) -> Tuple:
+            name, labels = key
+            base, _, le = labels.partition('le="')
+            bound = float(le.rstrip('"')) if le else 0.0
+            suffix = 1 if name.endswith("_sum") else 2 if name.endswith("_count") else 0
+            return base.rstrip(","), suffix, bound
+
+        lines = []
+        for family, (kind, help_text) in self.FAMILIES.items():
+            names = [family] if kind != "histogram" else [f"{family}_{s}" for s in ("bucket", "sum", "count")]
+            series = sorted((key for key in totals if key[0] in names), key=order)
+            if not series:
+                continue
+            lines.append(f"# HELP {family} {help_text}")
+            lines.append(f"# TYPE {family} {kind}")
+            for name, labels in series:
+                value = totals[(name, labels)]
+                text = str(int(value)) if float(value).is_integer() else repr(value)
+                lines.append(f"{name}{{{labels}}} {text}" if labels else f"{name} {text}")
+        return "\n".join(lines) + "\n"
+
+
+class BookmarkManager(BookmarkStore):
+    """Command-line interface built on BookmarkStore."""
+
+    def __init__(self):
+        super().__init__()
+        self.platform = platform.system().lower()
+        metrics_file = os.environ.get("BOOKMARK_METRICS_FILE", "")
+        self.metrics = Metrics(Path(metrics_file).expanduser() if metrics_file else None)
+        self.listing_cache_file = _cache_dir() / "listings.json"
+        self._listing_cache = None  # OrderedDict path -> (mtime_ns, subdirs), LRU order
+        history_file = os.environ.get("BOOKMARK_HISTORY_FILE", "")
+        self.history_file = (
+            Path(history_file).expanduser() if history_file else Path.home() / ".dir-bookmarks-history.bin"
+        )
+        jumps_file = os.environ.get("BOOKMARK_JUMPS_FILE", "")
+        self.jumps_file = Path(jumps_file).expanduser() if jumps_file else Path.home() / ".dir-bookmarks-jumps.txt"
+        # Warnings from the selector's loader thread wait until the terminal is restored
+        self._held_warnings = None
+        self._warn_lock = threading.Lock()
+
+    def _warn(self, message: str) -> None:
+        with self._warn_lock:
+            if self._held_warnings is not None:
+                self._held_warnings.append(message)  # The selector owns the terminal
+                return
+        print(message, file=sys.stderr)
+
+    def _view(self) -> dict:
+        view = super()._view()
+        self.metrics.set("bookmark_store_entries", "", len(view["merged"]))
+        return view
+
+    def save_bookmarks(self, bookmarks: Dict[str, str], added: Optional[Dict[str, bool]] = None) -> bool:
         """Save bookmarks to file.
         
         Args:
             bookmarks: Dictionary mapping paths to bookmark names
+            added: Paths just added, mapped to whether they were added automatically
             
         Returns:
             bool: True if successful, False otherwise
         """
         try:
-            # Create parent directory if it doesn't exist
-            self.bookmark_file.parent.mkdir(parents=True, exist_ok=True)
-            
-            with open(self.bookmark_file, "w", encoding="utf-8") as f:
-                # Write header comment
-                f.write("# Directory Bookmarks - Format: name|path\n")
-                f.write(f"# Generated by Bookmark Manager v3.0 on {platform.node()}\n")
-                f.write("\n")
-                
-                # Sort bookmarks by name for consistent output
-                for path, name in sorted(bookmarks.items(), key=lambda x: x[1].lower()):
-                    f.write(f"{name}|{path}\n")
-                    
+            self._save(bookmarks, added)
+            self.metrics.inc("bookmark_saves_total", 'result="ok"')
             return True
         except PermissionError:
             print(f"Error: Permission denied writing to {self.bookmark_file}", file=sys.stderr)
-            return False
         except Exception as e:
             print(f"Error saving bookmarks: {e}", file=sys.stderr)
-            return False
+        self.metrics.inc("bookmark_saves_total", 'result="error"')
+        return False
 
     def add_bookmark(self) -> None:
         """Add current directory as bookmark with interactive input."""
+        error = self._path_error(self.current_dir)
+        if error:
+            print(error, file=sys.stderr)
+            return
+
         bookmarks = self.load_bookmarks()
 
-        # Check if current directory is already bookmarked
-        if self.current_dir in bookmarks:
+        # Check if current directory is already bookmarked (under an alias path with the same name)
+        existing = self._find_bookmarked_path(bookmarks, self.current_dir)
+        if existing is not None:
+            alias = f" (via '{existing}')" if existing != self.current_dir else ""
             print(
-                f"Directory '{self.current_dir}' is already bookmarked as '{bookmarks[self.current_dir]}'",
+                f"Directory '{self.current_dir}' is already bookmarked as '{bookmarks[existing]}'{alias}",
                 file=sys.stderr,
             )
             return
@@ -105,53 +1744,319 @@ class BookmarkManager:
         if not friendly_name:
             return
 
-        # Check if friendly name already exists
-        existing_names = set(bookmarks.values())
-        if friendly_name in existing_names:
+        # Check if friendly name already exists
+        existing_names = set(bookmarks.values())
+        if friendly_name in existing_names:
+            print(f"A bookmark with the name '{friendly_name}' already exists.", file=sys.stderr)
+            overwrite = input("Do you want to overwrite it? (y/N): ").strip().lower()
+            if overwrite != "y":
+                print("Bookmark not saved.", file=sys.stderr)
+                return
+            # Remove existing bookmark with same name
+            bookmarks = {
+                path: name for path, name in bookmarks.items() if name != friendly_name
+            }
+
+        # Add new bookmark (BOOKMARK_AUTO=1 marks it as script-added, see --help)
+        bookmarks[self.current_dir] = friendly_name
+
+        if self.save_bookmarks(bookmarks, {self.current_dir: os.environ.get("BOOKMARK_AUTO", "0") == "1"}):
+            print(f"Bookmark '{friendly_name}' saved for '{self.current_dir}'", file=sys.stderr)
+        else:
+            print("Failed to save bookmark.", file=sys.stderr)
+
+    def remove_bookmark(self, target: Optional[str] = None) -> None:
+        """Remove bookmark for current directory.
+
+        Args:
+            target: Directory to unbookmark instead of the current one; any
+                path reaching the same directory (symlink, bind mount) matches
+        """
+        bookmarks = self.load_bookmarks()
+        target = os.path.abspath(os.path.expanduser(target)) if target else self.current_dir
+
+        path = self._find_bookmarked_path(bookmarks, target)
+        if path is None:
+            # Before reporting a miss, check aliases named differently from the target
+            path = self._find_bookmarked_path(bookmarks, target, scan_all=True)
+        if path is None:
+            label = "current directory" if target == self.current_dir else "directory"
+            print(f"No bookmark found for {label}: {target}", file=sys.stderr)
+            return
+
+        bookmark_name = bookmarks[path]
+        del bookmarks[path]
+
+        if self.save_bookmarks(bookmarks):
+            print(f"Bookmark '{bookmark_name}' removed for '{path}'", file=sys.stderr)
+        else:
+            print("Failed to remove bookmark.", file=sys.stderr)
+
+    def run_operations(self, operations: List[Tuple]) -> int:
+        """Apply scripting operations as one transaction and report the outcome.
+
+        Args:
+            operations: Operations for BookmarkStore.apply
+
+        Returns:
+            int: Exit code: 0 when applied, 1 when an operation is invalid or
+            the bookmarks cannot be saved (nothing is changed then)
+        """
+        started = time.perf_counter()
+        try:
+            counts = self.apply(operations)
+        except ValueError as e:
+            print(e, file=sys.stderr)
+            print("No changes were made.", file=sys.stderr)
+            return 1
+        except OSError as e:
+            self.metrics.inc("bookmark_saves_total", 'result="error"')
+            print(f"Error saving bookmarks: {e}", file=sys.stderr)
+            print("No changes were made.", file=sys.stderr)
+            return 1
+        elapsed = time.perf_counter() - started
+        if any(counts.values()):
+            self.metrics.inc("bookmark_saves_total", 'result="ok"')
+        print(
+            f"Applied {len(operations)} operation(s): {counts['add']} added, "
+            f"{counts['remove']} removed, {counts['rename']} renamed",
+            file=sys.stderr,
+        )
+        if len(operations) >= BATCH_REPORT_MIN:
+            rate = len(operations) / max(elapsed, 1e-9)
+            print(f"Throughput: {rate:,.0f} operations/s ({elapsed * 1000:.0f} ms)", file=sys.stderr)
+        return 0
+
+    def _load_history_ranking(self) -> List[Tuple[str, float, int, int]]:
+        """Aggregate the cd-history ring buffer into ranked directories.
+
+        The buffer written by the goto shell hook is a fixed-size file of
+        HISTORY_RECORD_SIZE-byte slots, each holding "epoch<TAB>path\\n"
+        padded with NUL bytes; empty and torn slots are skipped. Directories
+        are ranked by frecency: every visit counts, recent visits count more.
+
+        Returns:
+            List[Tuple[str, float, int, int]]: (path, score, visits, last visit
+            epoch), best first
+        """
+        visits = {}
+        try:
+            with open(self.history_file, "rb") as f:
+                while True:
+                    record = f.read(HISTORY_RECORD_SIZE)
+                    if not record:
+                        break
+                    record = record.rstrip(b"\0")
+                    if not record.endswith(b"\n"):
+                        continue
+                    stamp, sep, path = record[:-1].partition(b"\t")
+                    if not sep or not stamp.isdigit() or not path.startswith(b"/"):
+                        continue
+                    visits.setdefault(path.decode("utf-8", errors="replace"), []).append(int(stamp))
+        except OSError:
+            return []
+
+        now = time.time()
+        ranking = []
+        for path, stamps in visits.items():
+            score = 0.0
+            for stamp in stamps:
+                age = now - stamp
+                if age < 3600:
+                    score += 4
+                elif age < 86400:
+                    score += 2
+                elif age < 7 * 86400:
+                    score += 1
+                else:
+                    score += 0.5
+            ranking.append((path, score, len(stamps), max(stamps)))
+        ranking.sort(key=lambda x: (-x[1], -x[3], x[0]))
+        return ranking
+
+    def _history_suggestions(self) -> List[Tuple[str, float, int, int]]:
+        """Ranked history directories that still exist and are not bookmarked."""
+        bookmarked = {self._path_identity(path) for path in self.load()}
+        return [
+            entry for entry in self._load_history_ranking()
+            if os.path.isdir(entry[0]) and self._path_identity(entry[0]) not in bookmarked
+        ]
+
+    def suggest_bookmarks(self, limit: Optional[str] = None) -> None:
+        """Show frequently visited directories that are not bookmarked yet.
+
+        Args:
+            limit: Maximum number of suggestions to show (default 20)
+        """
+        try:
+            count = int(limit) if limit else 20
+        except ValueError:
+            print(f"Invalid count: {limit}", file=sys.stderr)
+            return
+
+        suggestions = self._history_suggestions()[:count]
+        if not suggestions:
+            print("No suggestions. Enable the cd-history hook with BOOKMARK_HISTORY=1.", file=sys.stderr)
+            return
+
+        print("Frequently visited directories:", file=sys.stderr)
+        print("-" * 60, file=sys.stderr)
+        for i, (path, score, hits, last) in enumerate(suggestions, 1):
+            when = time.strftime("%Y-%m-%d %H:%M", time.localtime(last))
+            print(f"{i:2d}. {path}  ({hits} visits, last {when})", file=sys.stderr)
+        print("-" * 60, file=sys.stderr)
+        print("Use 'bookmark --promote N [name]' to bookmark one.", file=sys.stderr)
+
+    def promote_suggestion(self, number: Optional[str], name: Optional[str] = None) -> None:
+        """Bookmark the Nth suggestion from --suggest.
+
+        Args:
+            number: 1-based suggestion number
+            name: Bookmark name; defaults to the directory's base name
+        """
+        suggestions = self._history_suggestions()
+        try:
+            path = suggestions[int(number) - 1][0] if number and int(number) >= 1 else None
+        except (ValueError, IndexError):
+            path = None
+        if path is None:
+            print(f"Invalid suggestion number: {number}. See 'bookmark --suggest'.", file=sys.stderr)
+            return
+
+        friendly_name = (name or os.path.basename(path.rstrip("/")) or path).strip()
+        error = self._name_error(friendly_name)
+        if error:
+            print(error, file=sys.stderr)
+            return
+        bookmarks = self.load_bookmarks()
+        if friendly_name in bookmarks.values():
             print(f"A bookmark with the name '{friendly_name}' already exists.", file=sys.stderr)
-            overwrite = input("Do you want to overwrite it? (y/N): ").strip().lower()
-            if overwrite != "y":
-                print("Bookmark not saved.", file=sys.stderr)
-                return
-            # Remove existing bookmark with same name
-            bookmarks = {
-                path: name for path, name in bookmarks.items() if name != friendly_name
-            }
-
-        # Add new bookmark
-        bookmarks[self.current_dir] = friendly_name
+            return
 
-        if self.save_bookmarks(bookmarks):
-            print(f"Bookmark '{friendly_name}' saved for '{self.current_dir}'", file=sys.stderr)
+        bookmarks[path] = friendly_name
+        if self.save_bookmarks(bookmarks, {path: True}):
+            print(f"Bookmark '{friendly_name}' saved for '{path}'", file=sys.stderr)
         else:
             print("Failed to save bookmark.", file=sys.stderr)
 
-    def remove_bookmark(self) -> None:
-        """Remove bookmark for current directory."""
+    def merge_jumps(self) -> None:
+        """Fold the jump stacks of finished goto sessions into the jump history.
+
+        On exit each shell session writes its stack, oldest first and one
+        directory per line, to <jumps file>.<pid>.<n> and starts this in the
+        background. Session files are merged in the order they were written,
+        only the latest visit of each directory is kept, and the newest
+        JUMPS_LIMIT directories are written back for new sessions to start
+        from. An exclusive lock serialises sessions that exit together.
+        """
+        prefix = self.jumps_file.name + "."
+        try:
+            with _exclusive_lock(Path(f"{self.jumps_file}.lock")):
+                sessions = []
+                for entry in os.scandir(self.jumps_file.parent):
+                    suffix = entry.name[len(prefix):]
+                    if entry.name.startswith(prefix) and suffix.replace(".", "").isdigit():
+                        sessions.append((entry.stat().st_mtime_ns, entry.path))
+                if not sessions:
+                    return
+
+                jumps = []
+                for path in [str(self.jumps_file)] + [path for _, path in sorted(sessions)]:
+                    try:
+                        with open(path, "r", encoding="utf-8", errors="replace") as f:
+                            jumps.extend(line.rstrip("\n") for line in f if line.startswith("/"))
+                    except OSError:
+                        continue
+
+                latest = []
+                seen = set()
+                for directory in reversed(jumps):
+                    if directory not in seen:
+                        seen.add(directory)
+                        latest.append(directory)
+                latest = latest[:JUMPS_LIMIT]
+                latest.reverse()
+
+                _atomic_write(self.jumps_file, "".join(f"{directory}\n" for directory in latest))
+                for _, path in sessions:
+                    os.unlink(path)
+        except OSError as e:
+            print(f"Error merging jump history: {e}", file=sys.stderr)
+            sys.exit(1)
+
+    def rewrite_check(self) -> None:
+        """Show how this host's path rewrite rules apply to every bookmark.
+
+        Lists the rules that apply here, every bookmark a rule rewrites,
+        every bookmark whose (rewritten) directory is missing and rules that
+        match no bookmark. Exits with status 1 if any directory is missing.
+        """
+        report = self.rewrite_report()
+        rules = report["rules"]
+        print(f"Rewrite rules for host '{self.host}' ({self.rewrite_file}):", file=sys.stderr)
+        for source, target in sorted(rules.items()):
+            print(f"  {source} -> {target}", file=sys.stderr)
+        if not rules:
+            print("  (none)", file=sys.stderr)
+
+        print("-" * 60, file=sys.stderr)
+        rewritten = missing = 0
+        for name, path, local, exists in report["entries"]:
+            if local != path:
+                rewritten += 1
+            if not exists:
+                missing += 1
+                target = f"{path} -> {local}" if local != path else path
+                print(f"  MISSING    {name}: {target}", file=sys.stderr)
+            elif local != path:
+                print(f"  rewritten  {name}: {path} -> {local}", file=sys.stderr)
+        for source in report["unused"]:
+            print(f"  unused rule: {source} -> {rules[source]}", file=sys.stderr)
+        print("-" * 60, file=sys.stderr)
+        total = len(report["entries"])
+        print(f"Total: {total} bookmark(s), {rewritten} rewritten, {missing} missing", file=sys.stderr)
+        if missing:
+            sys.exit(1)
+
+    def dedupe_bookmarks(self) -> None:
+        """Remove bookmarks that point at an already-bookmarked directory."""
         bookmarks = self.load_bookmarks()
 
-        if self.current_dir not in bookmarks:
-            print(f"No bookmark found for current directory: {self.current_dir}", file=sys.stderr)
+        groups = {}
+        for path, name in sorted(bookmarks.items(), key=lambda x: x[1].lower()):
+            groups.setdefault(self._path_identity(path), []).append(path)
+
+        duplicates = []
+        for paths in groups.values():
+            if len(paths) < 2:
+                continue
+            # Keep the entry already stored under its canonical path, else the first by name
+            real = [p for p in paths if os.path.realpath(p) == p]
+            keep = real[0] if real else paths[0]
+            duplicates.extend((path, keep) for path in paths if path != keep)
+
+        if not duplicates:
+            print("No duplicate bookmarks found.", file=sys.stderr)
             return
 
-        bookmark_name = bookmarks[self.current_dir]
-        del bookmarks[self.current_dir]
+        print("Duplicate bookmarks:", file=sys.stderr)
+        for path, keep in duplicates:
+            print(f"  - {bookmarks[path]} -> {path} (same as '{bookmarks[keep]}' -> {keep})", file=sys.stderr)
+        try:
+            confirm = input(f"Remove these {len(duplicates)} duplicate(s)? (y/N): ").strip().lower()
+        except (KeyboardInterrupt, EOFError):
+            print("\nCancelled.", file=sys.stderr)
+            return
+        if confirm != "y":
+            print("Operation cancelled.", file=sys.stderr)
+            return
 
+        for path, _ in duplicates:
+            del bookmarks[path]
         if self.save_bookmarks(bookmarks):
-            print(f"Bookmark '{bookmark_name}' removed for '{self.current_dir}'", file=sys.stderr)
+            print(f"Removed {len(duplicates)} duplicate bookmark(s).", file=sys.stderr)
         else:
-            print("Failed to remove bookmark.", file=sys.stderr)
-
-    def _get_sorted_bookmark_list(self) -> List[Tuple[str, str]]:
-        """Get sorted list of bookmarks as (name, path) tuples.
-        
-        Returns:
-            List[Tuple[str, str]]: Sorted list of (name, path) tuples
-        """
-        bookmarks = self.load_bookmarks()
-        bookmark_list = [(name, path) for path, name in bookmarks.items()]
-        bookmark_list.sort(key=lambda x: x[0].lower())
-        return bookmark_list
+            print("Failed to remove duplicates.", file=sys.stderr)
 
     def _check_bookmarks_exist(self) -> bool:
         """Check if bookmarks exist and show message if empty.
@@ -159,8 +2064,7 @@ class BookmarkManager:
         Returns:
             bool: True if bookmarks exist, False otherwise
         """
-        bookmarks = self.load_bookmarks()
-        if not bookmarks:
+        if not self._get_sorted_bookmark_list():
             print("No bookmarks found.", file=sys.stderr)
             print("Use 'bookmark' command to create bookmarks.", file=sys.stderr)
             return False
@@ -168,7 +2072,7 @@ class BookmarkManager:
 
     def _display_bookmark_menu(
         self, title: str = "Bookmarked directories", width: int = 40, show_lowercase: bool = True
-    ) -> List[Tuple[str, str]]:
+    ) -> BookmarkTable:
         """Display bookmarks menu with numbers.
         
         Args:
@@ -177,7 +2081,7 @@ class BookmarkManager:
             show_lowercase: Whether to display names in lowercase
             
         Returns:
-            List[Tuple[str, str]]: List of (name, path) tuples
+            BookmarkTable: Sorted (name, path) entries
         """
         bookmark_list = self._get_sorted_bookmark_list()
 
@@ -190,7 +2094,7 @@ class BookmarkManager:
         return bookmark_list
 
     def _resolve_bookmark_name(self, query: str) -> Optional[str]:
-        """Resolve a bookmark name (exact or unique partial) to a path.
+        """Resolve a bookmark name to a path, recording lookup metrics.
 
         Args:
             query: Bookmark name or partial match (case-insensitive)
@@ -198,41 +2102,161 @@ class BookmarkManager:
         Returns:
             Optional[str]: Matched path, or None if no unique match
         """
-        if not query:
-            return None
-        bookmark_list = self._get_sorted_bookmark_list()
-        q = query.lower()
-        exact = [(n, p) for n, p in bookmark_list if n.lower() == q]
-        if len(exact) == 1:
-            return exact[0][1]
-        partial = [(n, p) for n, p in bookmark_list if q in n.lower()]
-        if len(partial) == 1:
-            return partial[0][1]
-        if len(partial) > 1:
+        started = time.perf_counter()
+        outcome, path = self._resolve_with_fallback(query)
+        self.metrics.inc("bookmark_lookups_total", f'outcome="{outcome}"')
+        self.metrics.observe("bookmark_lookup_duration_seconds", "", time.perf_counter() - started)
+        return path
+
+    def _resolve_with_fallback(self, query: str) -> Tuple[str, Optional[str]]:
+        """Resolve a bookmark name, falling back to the cd history on a miss.
+
+        A query of the form name/sub/path resolves name and appends the
+        subpath, unless the whole query is itself an exact bookmark name.
+        Ambiguities and misses are reported on stderr.
+
+        Args:
+            query: Bookmark name or partial match (case-insensitive)
+
+        Returns:
+            Tuple[str, Optional[str]]: Outcome ("exact", "partial", "ambiguous",
+            "history" or "miss") and the matched path, or None
+        """
+        outcome, path, matches = self.resolve(query)
+        if path is not None:
+            self.record_use(matches[0][1])
+            return outcome, path
+        if outcome == "ambiguous":
             print(f"Ambiguous bookmark '{query}' matches:", file=sys.stderr)
-            for n, p in partial:
+            for n, p in matches:
                 print(f"  - {n} -> {p}", file=sys.stderr)
-            return None
+            return outcome, None
+        if not query:
+            return outcome, None
+
+        # Fall back to frequently visited directories from the cd history
+        head, tail = query, ""
+        if "/" in query and not query.startswith("/"):
+            head, _, tail = query.partition("/")
+            tail = tail.lstrip("/")
+        q = head.lower()
+        for path, _, _, _ in self._load_history_ranking():
+            if q in os.path.basename(path).lower() and os.path.isdir(path):
+                print(f"(from cd history) {path}", file=sys.stderr)
+                return "history", os.path.normpath(os.path.join(path, tail)) if tail else path
         print(f"No bookmark matching '{query}'.", file=sys.stderr)
-        return None
+        return outcome, None
+
+    def _list_subdirs(self, directory: str) -> List[str]:
+        """List subdirectory names, served from a bounded on-disk LRU cache.
+
+        Listings are keyed by (path, mtime); a directory's mtime changes
+        whenever entries are added, removed or renamed, so a cache hit costs
+        a single stat instead of a full scandir on slow filesystems.
+
+        Args:
+            directory: Directory to list
+
+        Returns:
+            List[str]: Sorted subdirectory names
+        """
+        try:
+            mtime = os.stat(directory).st_mtime_ns
+        except OSError:
+            return []
+
+        if self._listing_cache is None:
+            self._listing_cache = OrderedDict()
+            try:
+                with open(self.listing_cache_file, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if data.get("version") == 1:
+                    for path, cached_mtime, names in data.get("entries", []):
+                        self._listing_cache[path] = (cached_mtime, names)
+            except (OSError, ValueError, TypeError):
+                pass
+
+        cache = self._listing_cache
+        cached = cache.get(directory)
+        if cached is not None and cached[0] == mtime:
+            if next(reversed(cache)) == directory:
+                return cached[1]
+            cache.move_to_end(directory)
+            names = cached[1]
+        else:
+            names = []
+            try:
+                with os.scandir(directory) as it:
+                    for entry in it:
+                        try:
+                            if entry.is_dir():
+                                names.append(entry.name)
+                        except OSError:
+                            continue
+            except OSError:
+                return []
+            names.sort()
+            cache[directory] = (mtime, names)
+            cache.move_to_end(directory)
+            while len(cache) > LISTING_CACHE_SIZE:
+                cache.popitem(last=False)
+
+        _write_cache(self.listing_cache_file, {"version": 1, "entries": [[p, m, n] for p, (m, n) in cache.items()]})
+        return names
+
+    def complete(self, word: str) -> None:
+        """Print shell completion candidates for goto, one per line.
+
+        Without a slash, bookmark names starting with word are printed. With
+        name/sub/pa, subdirectories beneath the bookmark are completed.
+
+        Args:
+            word: Word being completed
+        """
+        if "/" not in word:
+            for name, _ in self._get_sorted_bookmark_list():
+                if name.startswith(word):
+                    print(name)
+            return
+
+        head, _, tail = word.partition("/")
+        outcome, matches = self._match_bookmark_name(head)
+        if outcome != "exact":
+            return
+        sub_dir, _, leaf = tail.rpartition("/")
+        sub_dir = sub_dir.lstrip("/")
+        prefix = f"{head}/{sub_dir}/" if sub_dir else f"{head}/"
+        for child in self._list_subdirs(os.path.normpath(os.path.join(matches[0][1], sub_dir))):
+            if child.startswith(leaf) and (leaf.startswith(".") or not child.startswith(".")):
+                print(f"{prefix}{child}/")
 
     def _interactive_select(
         self,
-        bookmark_list: List[Tuple[str, str]],
+        bookmark_list: Sequence[Tuple[str, str]],
         title: str = "Bookmarked directories",
         prompt: str = "\u2191/\u2193 move  type-to-filter  # jump  Enter  q/Esc quit",
-    ) -> Optional[str]:
+        multi: bool = False,
+        stream: Optional[Iterable[Tuple[str, str]]] = None,
+    ) -> Optional[Union[str, Set[str]]]:
         """Interactive arrow-key selector with type-to-filter.
 
         Args:
-            bookmark_list: List of (name, path) tuples
+            bookmark_list: (name, path) entries
             title: Title to display above the menu
             prompt: Footer hint shown below the menu
+            multi: Allow marking several rows (Tab toggles, Ctrl-A toggles
+                all filtered rows); Enter returns the marked paths, or the
+                highlighted one when nothing is marked
+            stream: Entries to load on a background thread instead of
+                bookmark_list. They are shown in arrival order as they are
+                parsed, then deduplicated by path and sorted by name once
+                the stream ends.
 
         Returns:
-            Optional[str]: Selected path, or None if cancelled
+            Optional[Union[str, Set[str]]]: Selected path (a set of paths
+            when multi is True), or None if cancelled
         """
-        if not bookmark_list:
+        if not bookmark_list and stream is None:
             return None
 
         fd = None
@@ -251,6 +2275,13 @@ class BookmarkManager:
             interactive = False
 
         if not interactive:
+            if stream is not None:
+                bookmark_list = self._stream_table(stream)
+                if not bookmark_list:
+                    self._check_bookmarks_exist()
+                    return None
+            if multi:
+                return self._get_user_multi_selection(bookmark_list)
             return self._get_user_selection(
                 bookmark_list, "Select a directory (number) or 0 to exit: "
             )
@@ -264,6 +2295,70 @@ class BookmarkManager:
         query = ""
         digit_buf = ""
         digit_deadline = 0.0
+        marked = set()  # Paths marked in multi mode
+
+        # Optional preview pane (BOOKMARK_PREVIEW=1 or Ctrl-P). Directory I/O
+        # runs on a worker thread; it wakes this loop through a pipe, and a
+        # newer highlight cancels an unfinished scan, so keys never wait on it.
+        show_preview = os.environ.get("BOOKMARK_PREVIEW", "0") == "1"
+        preview_cache = OrderedDict()  # path -> preview lines, LRU order
+        preview_lock = threading.Lock()
+        preview_state = {"want": None}
+        preview_queue = None
+        wake_r = wake_w = None  # Background threads wake the key loop through this pipe
+
+        def open_wake_pipe() -> None:
+            nonlocal wake_r, wake_w
+            if wake_r is None:
+                wake_r, wake_w = os.pipe()
+
+        def start_preview_worker() -> None:
+            nonlocal preview_queue
+            if preview_queue is not None:
+                return
+            preview_queue = queue.Queue()
+            open_wake_pipe()
+
+            def worker() -> None:
+                while True:
+                    path = preview_queue.get()
+                    if path is None:
+                        return
+                    with preview_lock:
+                        if preview_state["want"] != path or path in preview_cache:
+                            continue
+                    lines = self._preview_directory(path, lambda: preview_state["want"] != path)
+                    if lines is None:
+                        continue  # Cancelled: the highlight moved on
+                    with preview_lock:
+                        preview_cache[path] = lines
+                        while len(preview_cache) > PREVIEW_CACHE_SIZE:
+                            preview_cache.popitem(last=False)
+                    try:
+                        os.write(wake_w, b"x")
+                    except OSError:
+                        return
+
+            threading.Thread(target=worker, daemon=True).start()
+
+        def preview_lines(path: Optional[str]) -> List[str]:
+            if path is None:
+                return [""] * PREVIEW_LINES
+            with preview_lock:
+                lines = preview_cache.get(path)
+                if lines is not None:
+                    preview_cache.move_to_end(path)
+                elif preview_state["want"] != path:
+                    preview_state["want"] = path
+                    preview_queue.put(path)
+            if lines is None:
+                lines = ["  \u2026 loading preview"]
+            return (lines + [""] * PREVIEW_LINES)[:PREVIEW_LINES]
+
+        def list_rows() -> int:
+            # title, sep, path preview, sep, filter, prompt = 6 fixed lines
+            fixed = 6 + (PREVIEW_LINES if show_preview else 0)
+            return max(term_size()[1] - fixed, 1)
 
         def term_size() -> Tuple[int, int]:
             try:
@@ -272,11 +2367,85 @@ class BookmarkManager:
             except Exception:
                 return 80, 24
 
-        def filtered() -> List[Tuple[str, str]]:
+        # Progressive loading: a loader thread parses the stream and hands
+        # over chunks; the list grows in arrival order and is replaced by the
+        # sorted table when the stream ends. Keys are handled throughout.
+        loading = stream is not None
+        no_bookmarks = "No bookmarks found.\r\nUse 'bookmark' command to create bookmarks."
+        load_lock = threading.Lock()
+        load_state = {"pending": [], "final": None, "stop": False}
+
+        def start_loader() -> None:
+            open_wake_pipe()
+
+            def publish(chunk: List[Tuple[str, str]], final: Optional[BookmarkTable] = None) -> None:
+                with load_lock:
+                    load_state["pending"].extend(chunk)
+                    if final is not None:
+                        load_state["final"] = final
+                try:
+                    os.write(wake_w, b"l")
+                except OSError:
+                    pass
+
+            def loader() -> None:
+                loaded = []
+                chunk = []
+                published = time_mod.monotonic()
+                try:
+                    for entry in stream:
+                        if load_state["stop"]:
+                            return
+                        loaded.append(entry)
+                        chunk.append(entry)
+                        if len(chunk) >= 256 and time_mod.monotonic() - published >= 0.02:
+                            publish(chunk)
+                            chunk = []
+                            published = time_mod.monotonic()
+                finally:
+                    if not load_state["stop"]:
+                        publish(chunk, self._stream_table(loaded))
+
+            threading.Thread(target=loader, daemon=True).start()
+
+        def absorb_loaded() -> None:
+            """Take over entries the loader has published since the last call."""
+            nonlocal bookmark_list, loading, candidates, index
+            with load_lock:
+                pending, load_state["pending"] = load_state["pending"], []
+                final = load_state["final"]
+            if final is None:
+                bookmark_list.extend(pending)
+                return
+            items = filtered()
+            highlighted = items[index][1] if 0 <= index < len(items) else None
+            bookmark_list, loading, candidates = final, False, None
+            last_filter[0] = None
+            items = filtered()
+            # Keep the same entry highlighted once the list is sorted
+            index = next((i for i, (_, path) in enumerate(items) if path == highlighted), 0)
+
+        candidates = None  # CandidateIndex, built on the first query once loaded
+        last_filter = [None, None]  # (query, entries seen), matching entries
+
+        def filtered() -> Sequence[Tuple[str, str]]:
+            nonlocal candidates
             if not query:
-                return list(bookmark_list)
-            q = query.lower()
-            return [(n, p) for n, p in bookmark_list if q in n.lower() or q in p.lower()]
+                return bookmark_list
+            if last_filter[0] != (query, len(bookmark_list)):
+                if loading:
+                    q = query.lower()
+                    matches = [(n, p) for n, p in bookmark_list if q in n.lower() or q in p.lower()]
+                else:
+                    if candidates is None:
+                        candidates = CandidateIndex(bookmark_list)
+                    found = candidates.search(query)
+                    if isinstance(bookmark_list, BookmarkTable):
+                        matches = bookmark_list.take(found)
+                    else:
+                        matches = [bookmark_list[i] for i in found]
+                last_filter[:] = [(query, len(bookmark_list)), matches]
+            return last_filter[1]
 
         def truncate(text: str, max_len: int) -> str:
             if max_len < 4 or len(text) <= max_len:
@@ -285,8 +2454,7 @@ class BookmarkManager:
 
         def visible_window(items: List[Tuple[str, str]], cols: int, rows: int):
             n = len(items)
-            # title, sep, path preview, sep, filter, prompt = 6 fixed lines
-            avail = max(rows - 6, 1)
+            avail = list_rows()
             if n <= avail:
                 return 0, n, avail
             half = avail // 2
@@ -310,13 +2478,18 @@ class BookmarkManager:
             start, end, _ = visible_window(items, cols, rows)
             sep = "-" * min(cols - 1, 60)
 
-            lines = [f"{title} ({n}/{len(bookmark_list)})", sep]
+            header = f"{title} ({n}/{len(bookmark_list)}{', loading' if loading else ''})"
+            if multi:
+                header += f"  [{len(marked)} marked]"
+            lines = [header, sep]
             if n == 0:
                 lines.append("  (no matches)")
             else:
                 for i in range(start, end):
                     name, path = items[i]
                     num = f"{i + 1:2d}"
+                    if multi:
+                        num = ("[*] " if path in marked else "[ ] ") + num
                     if i == index:
                         label = truncate(f"> {num}. {name}", cols - 1)
                         lines.append(f"\033[7m{label}\033[0m")
@@ -337,6 +2510,9 @@ class BookmarkManager:
                 lines.append(truncate(f"  {items[index][1]}", cols - 1))
             else:
                 lines.append("  ")
+            if show_preview:
+                highlighted = items[index][1] if n > 0 and 0 <= index < n else None
+                lines.extend(truncate(line, cols - 1) for line in preview_lines(highlighted))
             filter_line = f"  filter: {query}_" if query else "  filter: (type to search)"
             lines.append(truncate(filter_line, cols - 1))
             lines.append(truncate(prompt, cols - 1))
@@ -417,12 +2593,41 @@ class BookmarkManager:
             if num == 0:
                 return "cancel"
             if 1 <= num <= len(items):
+                if multi:
+                    # In multi mode a number moves to and toggles its row
+                    index = num - 1
+                    marked.symmetric_difference_update({items[index][1]})
+                    return None
                 return items[num - 1][1]
             return None
 
+        def finish() -> Set[str]:
+            if marked:
+                return set(marked)
+            items = filtered()
+            return {items[index][1]} if 0 <= index < len(items) else set()
+
+        total_lines = 0
+        self._held_warnings = []
         sys.stderr.write("\033[?25l")  # hide cursor
-        total_lines = render()
         try:
+            if loading:
+                bookmark_list = []
+                start_loader()
+                # Small stores finish almost at once: skip drawing a partial list
+                deadline = time_mod.monotonic() + 0.05
+                while loading:
+                    remaining = deadline - time_mod.monotonic()
+                    if remaining <= 0 or not select_mod.select([wake_r], [], [], remaining)[0]:
+                        break
+                    os.read(wake_r, 512)
+                    absorb_loaded()
+                if not loading and not bookmark_list:
+                    cancel(no_bookmarks)
+                    return None
+            if show_preview:
+                start_preview_worker()
+            total_lines = render()
             while True:
                 # Multi-digit number entry: auto-commit after short idle
                 timeout = None
@@ -442,8 +2647,20 @@ class BookmarkManager:
                         continue
                     timeout = remaining
 
-                if timeout is not None:
-                    ready = select_mod.select([fd], [], [], timeout)[0]
+                if timeout is not None or wake_r is not None:
+                    watched = [fd] if wake_r is None else [fd, wake_r]
+                    ready = select_mod.select(watched, [], [], timeout)[0]
+                    if wake_r is not None and wake_r in ready:
+                        os.read(wake_r, 512)  # A preview finished or entries arrived: redraw
+                        if loading:
+                            absorb_loaded()
+                            if not loading and not bookmark_list:
+                                cancel(no_bookmarks)
+                                return None
+                        if fd not in ready:
+                            clear_block(total_lines)
+                            total_lines = render()
+                            continue
                     if not ready:
                         continue
                 key = read_key()
@@ -458,10 +2675,10 @@ class BookmarkManager:
                         index = (index + 1) % n
                 elif key == "pgup":
                     if n:
-                        index = max(0, index - max(term_size()[1] - 6, 1))
+                        index = max(0, index - list_rows())
                 elif key == "pgdn":
                     if n:
-                        index = min(n - 1, index + max(term_size()[1] - 6, 1))
+                        index = min(n - 1, index + list_rows())
                 elif key == "home":
                     index = 0
                 elif key == "end":
@@ -480,7 +2697,17 @@ class BookmarkManager:
                     if n and 0 <= index < n:
                         clear_block(total_lines)
                         sys.stderr.write("\033[?25h")
-                        return items[index][1]
+                        return finish() if multi else items[index][1]
+                elif key == "\t" and multi:
+                    if n and 0 <= index < n:
+                        marked.symmetric_difference_update({items[index][1]})
+                        index = min(index + 1, n - 1)
+                elif key == "\x01" and multi:  # Ctrl-A toggle all filtered
+                    paths = {p for _, p in items}
+                    if paths <= marked:
+                        marked -= paths
+                    else:
+                        marked |= paths
                 elif key == "\x03":  # Ctrl-C
                     cancel("Cancelled.")
                     return None
@@ -510,12 +2737,16 @@ class BookmarkManager:
                     if num == 0 and len(digit_buf) == 1:
                         cancel("Cancelled.")
                         return None
-                    if 1 <= num <= len(items) and num * 10 > len(items):
+                    if 1 <= num <= len(items) and num * 10 > len(items) and not loading:
                         result = flush_digit_buf()
                         if result and result != "cancel":
                             clear_block(total_lines)
                             sys.stderr.write("\033[?25h")
                             return result
+                elif key == "\x10":  # Ctrl-P toggle preview pane
+                    show_preview = not show_preview
+                    if show_preview:
+                        start_preview_worker()
                 elif key == "\x15":  # Ctrl-U clear filter
                     query = ""
                     digit_buf = ""
@@ -542,15 +2773,124 @@ class BookmarkManager:
             sys.stderr.write("\033[?25h")  # always show cursor again
             sys.stderr.flush()
             termios.tcsetattr(fd, termios.TCSADRAIN, old_settings)
+            with self._warn_lock:
+                held, self._held_warnings = self._held_warnings, None
+            for message in held:
+                print(message, file=sys.stderr)
+            load_state["stop"] = True
+            if preview_queue is not None:
+                preview_state["want"] = None
+                preview_queue.put(None)
+            if wake_r is not None:
+                os.close(wake_r)
+                os.close(wake_w)
+
+    @staticmethod
+    def _stream_table(entries: Iterable[Tuple[str, str]]) -> BookmarkTable:
+        """Build the sorted table for streamed entries; a later entry for a path wins.
+
+        Args:
+            entries: (name, path) entries in file order
+
+        Returns:
+            BookmarkTable: Entries sorted by name, as _get_sorted_bookmark_list orders them
+        """
+        bookmarks = {path: name for name, path in entries}
+        return BookmarkTable((name, path) for path, name in bookmarks.items()).sorted_by_name()
+
+    def _preview_directory(self, path: str, cancelled: Callable[[], bool]) -> Optional[List[str]]:
+        """Summarise a directory for the selector's preview pane.
+
+        Shows the git branch, entry counts with the total size of top-level
+        files, and the first few entries (directories first). Large
+        directories are scanned up to PREVIEW_SCAN_LIMIT entries.
+
+        Args:
+            path: Directory to summarise
+            cancelled: Polled during the scan; returning True aborts it
+
+        Returns:
+            Optional[List[str]]: Pane lines, or None if cancelled
+        """
+        if not os.path.isdir(path):
+            return ["  (directory not found)"]
+
+        branch = None
+        probe = path
+        for _ in range(32):
+            git = os.path.join(probe, ".git")
+            head_file = None
+            if os.path.isdir(git):
+                head_file = os.path.join(git, "HEAD")
+            elif os.path.isfile(git):
+                # Worktrees and submodules: .git is a "gitdir: <path>" file
+                try:
+                    with open(git, "r", encoding="utf-8") as f:
+                        gitdir = f.read().strip().partition("gitdir:")[2].strip()
+                    head_file = os.path.join(os.path.join(probe, gitdir), "HEAD")
+                except OSError:
+                    pass
+            if head_file:
+                try:
+                    with open(head_file, "r", encoding="utf-8") as f:
+                        head = f.read().strip()
+                    branch = head[len("ref: refs/heads/"):] if head.startswith("ref: refs/heads/") else head[:8]
+                except OSError:
+                    pass
+                break
+            parent = os.path.dirname(probe)
+            if parent == probe:
+                break
+            probe = parent
+
+        dirs, files, size, scanned = [], [], 0, 0
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    scanned += 1
+                    if scanned % 256 == 0 and cancelled():
+                        return None
+                    if scanned > PREVIEW_SCAN_LIMIT:
+                        break
+                    try:
+                        if entry.is_dir():
+                            dirs.append(entry.name + "/")
+                        else:
+                            files.append(entry.name)
+                            size += entry.stat(follow_symlinks=False).st_size
+                    except OSError:
+                        files.append(entry.name)
+        except OSError as e:
+            return [f"  (cannot read directory: {e.strerror or e})"]
+        if cancelled():
+            return None
+
+        more = "+" if scanned > PREVIEW_SCAN_LIMIT else ""
+        summary = f"{len(dirs)}{more} dirs, {len(files)}{more} files, {self._format_size(size)}"
+        lines = [f"  {'git:' + branch + '  ' if branch else ''}{summary}"]
+        entries = sorted(dirs, key=str.lower) + sorted(files, key=str.lower)
+        lines.extend(f"    {name}" for name in entries[: PREVIEW_LINES - 1])
+        return lines
+
+    @staticmethod
+    def _format_size(size: int) -> str:
+        """Format a byte count as a short human-readable size."""
+        if size < 1024:
+            return f"{size} B"
+        for unit in ("KB", "MB", "GB"):
+            size /= 1024
+            if size < 1024:
+                return f"{size:.1f} {unit}"
+        return f"{size / 1024:.1f} TB"
 
     def _get_user_selection(
-        self, bookmark_list: List[Tuple[str, str]], 
+        self, bookmark_list: Sequence[Tuple[str, str]], 
         prompt: str = "Select a directory (number) or 0 to exit: "
     ) -> Optional[Union[str, Tuple[str, str]]]:
         """Get user selection from bookmark list.
         
         Args:
-            bookmark_list: List of (name, path) tuples
+            bookmark_list: (name, path) entries
             prompt: Prompt message to display
             
         Returns:
@@ -584,17 +2924,223 @@ class BookmarkManager:
             print("\nCancelled.", file=sys.stderr)
             return None
 
-    def list_bookmarks(self) -> None:
-        """List all bookmarks and allow selection by number."""
+    def _get_user_multi_selection(self, bookmark_list: Sequence[Tuple[str, str]]) -> Optional[Set[str]]:
+        """Read a multi-selection such as "1,3,5-7" or "all" from stdin.
+
+        Args:
+            bookmark_list: (name, path) entries, already displayed
+
+        Returns:
+            Optional[Set[str]]: Selected paths, or None if cancelled/invalid
+        """
+        for i, (name, _) in enumerate(bookmark_list, 1):
+            print(f"{i:2d}. {name}", file=sys.stderr)
+        try:
+            print("Select directories (e.g. 1,3,5-7 or all) or 0 to exit: ", end="", file=sys.stderr)
+            sys.stderr.flush()
+            choice = sys.stdin.readline().strip().lower()
+        except KeyboardInterrupt:
+            print("\nCancelled.", file=sys.stderr)
+            return None
+
+        if not choice or choice == "0":
+            print("Exiting...", file=sys.stderr)
+            return None
+        if choice == "all":
+            return {path for _, path in bookmark_list}
+
+        selected = set()
+        try:
+            for part in choice.replace(" ", "").split(","):
+                first, _, last = part.partition("-")
+                lo, hi = int(first), int(last or first)
+                if not 1 <= lo <= hi <= len(bookmark_list):
+                    print(f"Invalid selection. Please choose 1-{len(bookmark_list)}", file=sys.stderr)
+                    return None
+                selected.update(path for _, path in bookmark_list[lo - 1 : hi])
+        except ValueError:
+            print("Invalid input. Please enter numbers, ranges or 'all'.", file=sys.stderr)
+            return None
+        return selected
+
+    def _select_many(self, bookmark_list: Sequence[Tuple[str, str]], title: str) -> List[Tuple[str, str]]:
+        """Run the selector in multi mode and return the chosen (name, path) tuples.
+
+        Args:
+            bookmark_list: (name, path) entries
+            title: Title to display above the menu
+
+        Returns:
+            List[Tuple[str, str]]: Selected entries in list order (empty if cancelled)
+        """
+        selected = self._interactive_select(
+            bookmark_list,
+            title,
+            "\u2191/\u2193 move  Tab mark  ^A mark all  type-to-filter  Enter done  q/Esc quit",
+            multi=True,
+        )
+        if not selected:
+            return []
+        return [(name, path) for name, path in bookmark_list if path in selected]
+
+    def remove_selected_bookmarks(self) -> None:
+        """Pick several bookmarks and remove them with a single file write."""
+        bookmarks = self.load_bookmarks()
+        if not bookmarks:
+            print("No bookmarks found.", file=sys.stderr)
+            return
+
+        bookmark_list = BookmarkTable((name, path) for path, name in bookmarks.items()).sorted_by_name()
+        chosen = self._select_many(bookmark_list, "Select bookmarks to remove")
+        if not chosen:
+            return
+
+        for name, path in chosen:
+            print(f"  - {name} -> {path}", file=sys.stderr)
+        try:
+            confirm = input(f"Remove these {len(chosen)} bookmark(s)? (y/N): ").strip().lower()
+        except (KeyboardInterrupt, EOFError):
+            print("\nCancelled.", file=sys.stderr)
+            return
+        if confirm != "y":
+            print("Operation cancelled.", file=sys.stderr)
+            return
+
+        for _, path in chosen:
+            del bookmarks[path]
+        if self.save_bookmarks(bookmarks):
+            print(f"Removed {len(chosen)} bookmark(s).", file=sys.stderr)
+        else:
+            print("Failed to remove bookmarks.", file=sys.stderr)
+
+    def open_selected_bookmarks(self) -> None:
+        """Pick several bookmarks and open each in the file manager."""
         if not self._check_bookmarks_exist():
             return
 
-        bookmark_list = self._get_sorted_bookmark_list()
+        chosen = self._select_many(self._get_sorted_bookmark_list(), "Select directories to open")
+        for _, path in chosen:
+            if not os.path.exists(path):
+                print(f"Directory not found: {path}", file=sys.stderr)
+                continue
+            print(path)
+            self._open_in_file_manager(path)
+
+    def export_selected_bookmarks(self, target: Optional[str] = None) -> None:
+        """Pick several bookmarks and write them as a bookmark file.
+
+        Args:
+            target: Output file; stdout when omitted
+        """
+        if not self._check_bookmarks_exist():
+            return
+
+        chosen = self._select_many(self._get_sorted_bookmark_list(), "Select bookmarks to export")
+        if not chosen:
+            return
+
+        if target is None:
+            for name, path in chosen:
+                print(f"{name}|{path}")
+            return
+        try:
+            self._write_bookmark_file(Path(target).expanduser(), {path: name for name, path in chosen})
+            print(f"Exported {len(chosen)} bookmark(s) to {target}", file=sys.stderr)
+        except PermissionError:
+            print(f"Error: Permission denied writing to {target}", file=sys.stderr)
+        except Exception as e:
+            print(f"Error exporting bookmarks: {e}", file=sys.stderr)
+
+    def list_bookmarks(
+        self,
+        fmt: Optional[str] = None,
+        name_filter: Optional[str] = None,
+        path_filter: Optional[str] = None,
+        sort: bool = True,
+    ) -> None:
+        """List all bookmarks and allow selection by number.
+
+        Args:
+            fmt: Machine-readable output format; skips the interactive menu
+            name_filter: Only include names containing this (case-insensitive)
+            path_filter: Only include paths containing this (case-insensitive)
+            sort: Sort by name (False streams records in file order)
+        """
+        if fmt:
+            self._write_records(self._filtered_bookmarks(name_filter, path_filter, sort), fmt)
+            return
+
+        if not self._check_bookmarks_exist():
+            return
+
+        bookmark_list = BookmarkTable(self._filtered_bookmarks(name_filter, path_filter, sort))
         selected_path = self._interactive_select(bookmark_list)
 
         if selected_path:
             print(selected_path)
 
+    def _filtered_bookmarks(
+        self, name_filter: Optional[str] = None, path_filter: Optional[str] = None, sort: bool = True
+    ) -> Iterator[Tuple[str, str]]:
+        """Yield (name, path) entries matching the optional substring filters.
+
+        Args:
+            name_filter: Substring the name must contain (case-insensitive)
+            path_filter: Substring the path must contain (case-insensitive)
+            sort: Sort by name; when False entries are streamed as parsed
+
+        Yields:
+            Tuple[str, str]: Matching (name, path) entries
+        """
+        source = self._get_sorted_bookmark_list() if sort else self.iter_bookmarks()
+        n_q = name_filter.lower() if name_filter else None
+        p_q = path_filter.lower() if path_filter else None
+        for name, path in source:
+            if n_q is not None and n_q not in name.lower():
+                continue
+            if p_q is not None and p_q not in path.lower():
+                continue
+            yield name, path
+
+    def _write_records(self, records: Iterable[Tuple[str, str]], fmt: str) -> None:
+        """Stream (name, path) records to stdout in a machine-readable format.
+
+        Each record is written as soon as it is produced, so large stores are
+        never held in memory as formatted text.
+
+        Args:
+            records: (name, path) entries
+            fmt: One of OUTPUT_FORMATS
+        """
+        out = sys.stdout
+        try:
+            if fmt == "json":
+                out.write("[")
+                sep = "\n"
+                for name, path in records:
+                    out.write(sep + json.dumps({"name": name, "path": path}))
+                    sep = ",\n"
+                out.write("\n]\n" if sep != "\n" else "]\n")
+            elif fmt == "jsonl":
+                for name, path in records:
+                    out.write(json.dumps({"name": name, "path": path}) + "\n")
+            elif fmt == "tsv":
+                for name, path in records:
+                    out.write(f"{self._tsv_escape(name)}\t{self._tsv_escape(path)}\n")
+            elif fmt == "null":
+                for name, path in records:
+                    out.write(f"{name}\0{path}\0")
+            out.flush()
+        except BrokenPipeError:
+            # Consumer (e.g. head) stopped reading; silence the flush at exit
+            devnull = os.open(os.devnull, os.O_WRONLY)
+            os.dup2(devnull, out.fileno())
+
+    @staticmethod
+    def _tsv_escape(value: str) -> str:
+        """Escape backslash, tab and newline for TSV output."""
+        return value.replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n")
+
     def open_bookmark(self) -> None:
         """List all bookmarks, allow selection, and open in file manager."""
         if not self._check_bookmarks_exist():
@@ -614,30 +3160,37 @@ class BookmarkManager:
             # Echo the directory path
             print(selected_path)
 
-            # Open in file manager based on platform
-            if self.platform == "darwin":  # macOS
-                self._run_command(
-                    ["open", selected_path],
-                    f"Opened '{selected_path}' in Finder",
-                    "Failed to open directory in Finder",
-                    "'open' command not found. This feature requires macOS.",
-                )
-            elif self.platform == "linux":  # Linux
-                self._run_command(
-                    ["xdg-open", selected_path],
-                    f"Opened '{selected_path}' in file manager",
-                    "Failed to open directory in file manager",
-                    "'xdg-open' command not found. This feature requires a desktop environment.",
-                )
-            elif self.platform == "windows":  # Windows
-                self._run_command(
-                    ["explorer", selected_path.replace("/", "\\")],
-                    f"Opened '{selected_path}' in File Explorer",
-                    "Failed to open directory in File Explorer",
-                    "This feature requires Windows.",
-                )
-            else:
-                print(f"Platform '{self.platform}' not supported for opening directories.", file=sys.stderr)
+            self._open_in_file_manager(selected_path)
+
+    def _open_in_file_manager(self, selected_path: str) -> None:
+        """Open a directory in the platform file manager.
+
+        Args:
+            selected_path: Directory to open
+        """
+        if self.platform == "darwin":  # macOS
+            self._run_command(
+                ["open", selected_path],
+                f"Opened '{selected_path}' in Finder",
+                "Failed to open directory in Finder",
+                "'open' command not found. This feature requires macOS.",
+            )
+        elif self.platform == "linux":  # Linux
+            self._run_command(
+                ["xdg-open", selected_path],
+                f"Opened '{selected_path}' in file manager",
+                "Failed to open directory in file manager",
+                "'xdg-open' command not found. This feature requires a desktop environment.",
+            )
+        elif self.platform == "windows":  # Windows
+            self._run_command(
+                ["explorer", selected_path.replace("/", "\\")],
+                f"Opened '{selected_path}' in File Explorer",
+                "Failed to open directory in File Explorer",
+                "This feature requires Windows.",
+            )
+        else:
+            print(f"Platform '{self.platform}' not supported for opening directories.", file=sys.stderr)
 
     def _run_command(self, command: List[str], success_msg: str, error_msg_prefix: str, not_found_msg: str) -> bool:
         """Run a subprocess command with error handling.
@@ -716,9 +3269,15 @@ class BookmarkManager:
                     print(f"Backup created: {backup_file}", file=sys.stderr)
                 
                 # Clear the file
-                with open(self.bookmark_file, "w", encoding="utf-8") as f:
-                    f.write("# Directory Bookmarks - Cleared\n")
-                    f.write(f"# Backup available at: {backup_file}\n")
+                if self.sync_dir is not None:
+                    # Record removals in the sync log so other hosts see them
+                    if not self.save_bookmarks({}):
+                        return
+                else:
+                    _atomic_write(
+                        self.bookmark_file,
+                        f"# Directory Bookmarks - Cleared\n# Backup available at: {backup_file}\n",
+                    )
                     
                 print("All bookmarks have been cleared.", file=sys.stderr)
             except Exception as e:
@@ -726,20 +3285,36 @@ class BookmarkManager:
         else:
             print("Operation cancelled.", file=sys.stderr)
 
-    def listall_bookmarks(self) -> None:
-        """List all bookmarks with their full paths."""
-        if not self._check_bookmarks_exist():
+    def listall_bookmarks(
+        self,
+        fmt: Optional[str] = None,
+        name_filter: Optional[str] = None,
+        path_filter: Optional[str] = None,
+        sort: bool = True,
+    ) -> None:
+        """List all bookmarks with their full paths.
+
+        Args:
+            fmt: Machine-readable output format instead of the text listing
+            name_filter: Only include names containing this (case-insensitive)
+            path_filter: Only include paths containing this (case-insensitive)
+            sort: Sort by name (False streams records in file order)
+        """
+        if fmt:
+            self._write_records(self._filtered_bookmarks(name_filter, path_filter, sort), fmt)
             return
 
-        bookmark_list = self._get_sorted_bookmark_list()
+        if not self._check_bookmarks_exist():
+            return
 
         # Display all bookmarks with their paths
         print("All bookmarked directories:", file=sys.stderr)
         print("-" * 60, file=sys.stderr)
-        for i, (name, path) in enumerate(bookmark_list, 1):
-            print(f"{i:2d}. {name} -> {path}", file=sys.stderr)
+        count = 0
+        for count, (name, path) in enumerate(self._filtered_bookmarks(name_filter, path_filter, sort), 1):
+            print(f"{count:2d}. {name} -> {path}", file=sys.stderr)
         print("-" * 60, file=sys.stderr)
-        print(f"Total: {len(bookmark_list)} bookmark(s)", file=sys.stderr)
+        print(f"Total: {count} bookmark(s)", file=sys.stderr)
 
     def show_help(self) -> None:
         """Display comprehensive help information."""
@@ -758,10 +3333,32 @@ OPTIONS:
                     - Prevents duplicate directories and names
                     - Saves to ~/.dir-bookmarks.txt
 
-    --remove        Remove bookmark for current directory
+    --remove [PATH] Remove bookmark for current directory (or PATH)
                     - Deletes the bookmark for the current working directory
+                    - Matches through symlinks and bind mounts
                     - Shows confirmation message
 
+    --add NAME PATH [--auto]
+                    Bookmark PATH as NAME without prompting
+                    - PATH must be an existing directory
+                    - --auto marks it script-added (see RETENTION)
+
+    --remove-name NAME
+                    Remove the bookmark called NAME without prompting
+
+    --rename OLD NEW
+                    Rename a bookmark, keeping its directory
+
+    --batch         Apply add/remove-name/rename commands read from stdin
+                    - One command per line, quoted like shell arguments;
+                      the leading -- is optional
+                    - All or nothing: one load, one check, one write
+                    - Reports throughput for large batches
+
+    --dedupe        Remove bookmarks that point at the same directory
+                    - Compares resolved paths and device/inode identity
+                    - Keeps the canonical path, asks for confirmation
+
     --list          List bookmarks and select one
                     - Shows bookmarks in lowercase, sorted alphabetically
                     - Prompts for number selection
@@ -775,15 +3372,39 @@ OPTIONS:
     --go [name]     Navigate to bookmarked directory
                     - Interactive menu: ↑/↓ or j/k, type-to-filter, Enter to select
                     - Number keys jump (multi-digit supported, e.g. 12)
+                    - Ctrl-P toggles a preview pane (entries, git branch,
+                      sizes); BOOKMARK_PREVIEW=1 shows it by default
                     - Optional name: exact or unique partial match
+                    - name/sub/path jumps to a subdirectory of the bookmark
+                    - Falls back to often-visited directories from the cd
+                      history when no bookmark matches
                     - Outputs selected directory path for shell navigation
                     - Used by goto shell function
 
+    --select-remove Mark several bookmarks and remove them together
+    --select-open   Mark several bookmarks and open each in the file manager
+    --select-export [FILE]
+                    Mark several bookmarks and write them as a bookmark file
+                    (to stdout when FILE is omitted)
+                    - Tab marks a row, Ctrl-A marks all filtered rows,
+                      Enter applies to the marked rows (or the highlighted one)
+                    - Without a terminal, enter numbers/ranges: 1,3,5-7 or all
+                    - Removal rewrites the bookmark file once for all rows
+
     --listall       Display all bookmarks with their full paths
                     - Shows name -> path mapping
                     - Includes total count
                     - No selection required
 
+    --list / --listall options:
+      --format F    Write records to stdout for scripts instead of the menu
+                    or listing. F is json, jsonl, tsv (name<TAB>path) or
+                    null (name\\0path\\0). Records are streamed as produced.
+      --name TEXT   Only bookmarks whose name contains TEXT
+      --path TEXT   Only bookmarks whose path contains TEXT
+      --unsorted    Keep file order; with --format the file is streamed
+                    without loading the whole store
+
     --debug         Open bookmarks file in text editor
                     - Opens ~/.dir-bookmarks.txt in available editor
                     - Tries VS Code, Vim, Nano, or Cat in that order
@@ -806,6 +3427,27 @@ OPTIONS:
                     - Creates backup of current bookmarks before restore
                     - Confirms before overwriting current bookmarks
 
+    --suggest [N]   Show up to N (default 20) often-visited, unbookmarked dirs
+                    - Built from the cd history recorded by the goto shell
+                      hook (export BOOKMARK_HISTORY=1 before sourcing it)
+                    - Ranked by visit count, weighted towards recent visits
+
+    --promote N [name]
+                    Bookmark suggestion N from --suggest
+                    - Name defaults to the directory's base name
+
+    --rewrite-check Check every bookmark against this host's rewrite rules
+                    - Shows rewritten and missing directories, and rules
+                      that match no bookmark; exits 1 if any is missing
+
+    --merge-jumps   Merge finished goto sessions into the jump history
+                    - Started in the background when a shell exits
+                    - Keeps the newest 200 distinct directories
+
+    --complete WORD Print goto completions for WORD (names, or name/sub/ dirs)
+                    - Used by the goto tab completion
+                    - Directory listings are cached by mtime
+
     --help          Show this help message
 
 EXAMPLES:
@@ -814,6 +3456,9 @@ EXAMPLES:
     bookmark --list             # List and select bookmark (outputs path)
     bookmark --open             # List and open bookmark in file manager
     bookmark --listall          # Show all bookmarks with paths
+    bookmark --listall --format jsonl --path work   # Script-friendly output
+    bookmark --add api ~/src/api --auto         # Scripted add, no prompt
+    printf 'add a /srv/a\nrename b c\n' | bookmark --batch
     bookmark --debug            # Edit bookmarks file in text editor
     bookmark --flush            # Clear all bookmarks
     bookmark --backup           # Create timestamped backup of bookmarks
@@ -827,11 +3472,71 @@ RELATED COMMANDS:
 
 FILES:
     ~/.dir-bookmarks.txt        # Bookmark storage file
+    /etc/dir-bookmarks.txt      # Read-only system bookmarks (BOOKMARK_SYSTEM_FILE)
+    $BOOKMARK_TEAM_FILE         # Read-only team bookmarks, e.g. on a shared mount
+    <project>/.dir-bookmarks    # Project bookmarks, found by walking up from the
+                                # current directory (BOOKMARK_PROJECT_FILE sets
+                                # the file name); relative paths are resolved
+                                # against the project directory
+    ~/.cache/dir-bookmarks/     # Cached copies of the system/team layers
+    ~/.dir-bookmarks-history.bin  # cd-history ring buffer (BOOKMARK_HISTORY_FILE)
+    ~/.dir-bookmarks-jumps.txt  # goto back/forward history (BOOKMARK_JUMPS_FILE)
+
+SYNC:
+    Set BOOKMARK_SYNC_DIR to a directory on the shared filesystem when the
+    same home is mounted on several hosts. Each host appends its edits to
+    its own <host>.log there (host name from BOOKMARK_HOST or the system),
+    and every reader merges all logs deterministically, so concurrent edits
+    from different hosts never overwrite each other. ~/.dir-bookmarks.txt is
+    then a snapshot of the merged state. A host's first log starts with the
+    bookmarks already in that file, and once most of a log's operations
+    are removed adds it is compacted, so reads stay proportional to the
+    live bookmarks rather than to the whole edit history.
+
+LAYERS:
+    Bookmarks from the system, team, project and user files are merged for
+    --list, --listall, --open and --go. On a clash of path or name the user
+    file wins over project, project over team, and team over system. Only
+    the user file is ever modified; shared layers are re-read only when
+    their mtime changes.
+
+REWRITES:
+    When one bookmark file is shared by hosts that mount the same trees at
+    different roots, list prefix rewrites in ~/.dir-bookmarks-rewrite.txt
+    (BOOKMARK_REWRITE_FILE), one host_glob|from|to rule per line:
+
+        build-*|/home/x/work|/mnt/work
+
+    On hosts matching host_glob, paths under from are shown and resolved
+    under to; the longest matching prefix wins. The file itself is never
+    changed, so every host keeps its own view.
+
+RETENTION:
+    Bookmarks added by scripts (BOOKMARK_AUTO=1 bookmark, or --promote)
+    are marked auto-added; bookmarks you add by hand are never evicted.
+    Set BOOKMARK_MAX_AUTO to keep at most that many auto-added bookmarks
+    and BOOKMARK_AUTO_TTL_DAYS to drop ones unused for that long. The
+    least recently used are evicted on the next save. Use is tracked in
+    ~/.dir-bookmarks-meta.json and ~/.dir-bookmarks-usage.log.
+
+METRICS:
+    Set BOOKMARK_METRICS_FILE to a path in node-exporter's textfile
+    directory to record invocation counts, lookup outcomes, saves, the
+    store size and latency histograms there in Prometheus format. Every
+    invocation adds to the totals in the file under a lock.
+
+SCRIPTING:
+    --add, --remove-name, --rename and --batch never prompt. They exit 0
+    when applied, 1 when an operation is invalid or the file cannot be
+    written (nothing is changed then), and 2 on a usage error.
 
 NOTES:
     - Bookmarks are stored as: friendly_name|/full/path/to/directory
     - Directory names are displayed in lowercase but stored with original case
-    - Duplicate directory paths and friendly names are prevented
+    - Duplicate directory paths and friendly names are prevented, including
+      the same directory reached through a symlink or bind mount that ends
+      in the same directory name; --dedupe also finds aliases named
+      differently
     - The --open feature supports multiple platforms (macOS, Linux, Windows)
     - The --debug feature tries multiple editors automatically
     - All operations include proper error handling and user feedback
@@ -856,19 +3561,18 @@ Platform: Cross-platform (macOS, Linux, Windows)
         Args:
             name: Optional bookmark name for direct jump (exact or unique partial)
         """
-        if not self._check_bookmarks_exist():
-            return
-
         if name:
+            # Resolved even with no bookmarks: the cd history may still match
             selected_path = self._resolve_bookmark_name(name)
             if selected_path:
                 print(selected_path)
             return
 
-        bookmark_list = self._get_sorted_bookmark_list()
-        selected_path = self._interactive_select(bookmark_list)
+        # Entries are parsed while the selector is already on screen
+        selected_path = self._interactive_select([], stream=self.iterate(sort=False))
 
         if selected_path:
+            self.record_use(selected_path)
             print(selected_path)
 
     def backup_bookmarks(self) -> None:
@@ -996,6 +3700,8 @@ Platform: Cross-platform (macOS, Linux, Windows)
 
                         # Restore from selected backup
                         shutil.copy2(selected_backup, self.bookmark_file)
+                        if self.sync_dir is not None:
+                            self.save_bookmarks(self._parse_bookmark_file(self.bookmark_file))
 
                         # Verify restore
                         restored_bookmarks = self.load_bookmarks()
@@ -1035,19 +3741,9 @@ Platform: Cross-platform (macOS, Linux, Windows)
         while True:
             try:
                 friendly_name = input(prompt).strip()
-                if not friendly_name:
-                    print("Please enter a valid name.", file=sys.stderr)
-                    continue
-                
-                # Basic validation
-                if len(friendly_name) > 100:
-                    print("Name too long. Please use a shorter name.", file=sys.stderr)
-                    continue
-                
-                # Check for invalid characters for file paths
-                invalid_chars = ['<', '>', ':', '"', '|', '?', '*']
-                if any(char in friendly_name for char in invalid_chars):
-                    print("Name contains invalid characters. Please use a different name.", file=sys.stderr)
+                error = self._name_error(friendly_name)
+                if error:
+                    print(error, file=sys.stderr)
                     continue
                 
                 return friendly_name
@@ -1057,16 +3753,114 @@ Platform: Cross-platform (macOS, Linux, Windows)
                 return None
 
 
+def _parse_list_options(args: List[str]) -> Optional[dict]:
+    """Parse --format/--name/--path/--unsorted for --list and --listall.
+
+    Args:
+        args: Arguments following the command
+
+    Returns:
+        Optional[dict]: Keyword arguments for the list commands, or None on error
+    """
+    options = {"fmt": None, "name_filter": None, "path_filter": None, "sort": True}
+    keys = {"--format": "fmt", "--name": "name_filter", "--path": "path_filter"}
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        if arg == "--unsorted":
+            options["sort"] = False
+        elif arg in keys:
+            if i + 1 >= len(args):
+                print(f"Option {arg} requires a value", file=sys.stderr)
+                return None
+            options[keys[arg]] = args[i + 1]
+            i += 1
+        else:
+            print(f"Unknown option: {arg}", file=sys.stderr)
+            return None
+        i += 1
+    if options["fmt"] is not None and options["fmt"] not in OUTPUT_FORMATS:
+        print(f"Unknown format '{options['fmt']}'. Use one of: {', '.join(OUTPUT_FORMATS)}", file=sys.stderr)
+        return None
+    return options
+
+
+def _parse_operation(args: List[str]) -> Tuple:
+    """Turn one scripting command into an operation for BookmarkStore.apply.
+
+    Args:
+        args: Command and arguments, e.g. ["--add", "api", "/srv/api"]; the
+            leading dashes are optional, as in --batch input
+
+    Returns:
+        Tuple: ("add", name, path, auto), ("remove", name) or ("rename", old, new)
+
+    Raises:
+        ValueError: With a usage message if args do not form a valid command
+    """
+    command = args[0].lstrip("-") if args else ""
+    params = args[1:]
+    if command == "add":
+        names = [p for p in params if p != "--auto"]
+        if len(names) == 2:
+            return ("add", names[0], names[1], len(names) < len(params))
+        raise ValueError("Usage: bookmark --add NAME PATH [--auto]")
+    if command == "remove-name":
+        if len(params) == 1:
+            return ("remove", params[0])
+        raise ValueError("Usage: bookmark --remove-name NAME")
+    if command == "rename":
+        if len(params) == 2:
+            return ("rename", params[0], params[1])
+        raise ValueError("Usage: bookmark --rename OLD NEW")
+    raise ValueError(f"Unknown operation: {args[0] if args else ''} (use add, remove-name or rename)")
+
+
+def _parse_batch(lines: Iterable[str]) -> Optional[List[Tuple]]:
+    """Parse --batch input: one command per line, split like a shell would.
+
+    Blank lines and lines starting with # are skipped.
+
+    Args:
+        lines: Input lines
+
+    Returns:
+        Optional[List[Tuple]]: Operations in input order, or None (after
+        printing every problem) if any line is malformed
+    """
+    operations = []
+    valid = True
+    for number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        try:
+            # shlex is only needed for quoting; plain lines split on whitespace
+            words = shlex.split(line) if any(c in line for c in "'\"\\") else line.split()
+            operations.append(_parse_operation(words))
+        except ValueError as e:
+            print(f"Line {number}: {e}", file=sys.stderr)
+            valid = False
+    return operations if valid else None
+
+
 def main() -> None:
     """Main entry point for the bookmark manager."""
+    started = time.perf_counter()
+    manager = None
     try:
         manager = BookmarkManager()
 
         # Command mapping for cleaner main function
         commands = {
             "--remove": manager.remove_bookmark,
+            "--dedupe": manager.dedupe_bookmarks,
+            "--rewrite-check": manager.rewrite_check,
+            "--merge-jumps": manager.merge_jumps,
             "--list": manager.list_bookmarks,
             "--open": manager.open_bookmark,
+            "--select-remove": manager.remove_selected_bookmarks,
+            "--select-open": manager.open_selected_bookmarks,
             "--go": manager.go_bookmark,
             "--debug": manager.debug_bookmarks,
             "--flush": manager.flush_bookmarks,
@@ -1080,15 +3874,48 @@ def main() -> None:
 
         if len(sys.argv) > 1:
             command = sys.argv[1]
-            if command == "--go":
+            if command == "--suggest":
+                manager.suggest_bookmarks(sys.argv[2] if len(sys.argv) > 2 else None)
+            elif command == "--promote":
+                manager.promote_suggestion(
+                    sys.argv[2] if len(sys.argv) > 2 else None, sys.argv[3] if len(sys.argv) > 3 else None
+                )
+            elif command == "--remove":
+                manager.remove_bookmark(sys.argv[2] if len(sys.argv) > 2 else None)
+            elif command in ("--add", "--remove-name", "--rename"):
+                try:
+                    operation = _parse_operation(sys.argv[1:])
+                except ValueError as e:
+                    print(e, file=sys.stderr)
+                    sys.exit(2)
+                sys.exit(manager.run_operations([operation]))
+            elif command == "--batch":
+                operations = _parse_batch(sys.stdin)
+                if operations is None:
+                    print("No changes were made.", file=sys.stderr)
+                    sys.exit(2)
+                sys.exit(manager.run_operations(operations))
+            elif command == "--select-export":
+                manager.export_selected_bookmarks(sys.argv[2] if len(sys.argv) > 2 else None)
+            elif command == "--complete":
+                manager.complete(sys.argv[2] if len(sys.argv) > 2 else "")
+            elif command == "--go":
                 name = sys.argv[2] if len(sys.argv) > 2 else None
                 manager.go_bookmark(name)
+            elif command in ("--list", "--listall"):
+                options = _parse_list_options(sys.argv[2:])
+                if options is None:
+                    sys.exit(1)
+                if command == "--list":
+                    manager.list_bookmarks(**options)
+                else:
+                    manager.listall_bookmarks(**options)
             elif command in commands:
                 commands[command]()
             else:
                 print(f"Unknown option: {command}", file=sys.stderr)
                 print(
-                    "Usage: bookmark [--remove|--list|--open|--go [name]|--debug|--flush|--listall|--backup|--restore|--help]",
+                    "Usage: bookmark [--add name path [--auto]|--remove-name name|--rename old new|--batch|--remove [path]|--dedupe|--rewrite-check|--list [opts]|--open|--select-remove|--select-open|--select-export [file]|--go [name]|--debug|--flush|--listall [opts]|--backup|--restore|--suggest [n]|--promote n [name]|--help]",
                     file=sys.stderr,
                 )
                 sys.exit(1)
@@ -1102,6 +3929,19 @@ def main() -> None:
     except Exception as e:
         print(f"Unexpected error: {e}", file=sys.stderr)
         sys.exit(1)
+    finally:
+        if manager is not None and manager.metrics.path is not None:
+            command = sys.argv[1] if len(sys.argv) > 1 else "add"
+            special = (
+                "--suggest", "--promote", "--select-export", "--complete",
+                "--add", "--remove-name", "--rename", "--batch",
+            )
+            if command != "add" and command not in commands and command not in special:
+                command = "unknown"  # Keep label values bounded
+            label = f'command="{command.lstrip("-")}"'
+            manager.metrics.inc("bookmark_invocations_total", label)
+            manager.metrics.observe("bookmark_command_duration_seconds", label, time.perf_counter() - started)
+            manager.metrics.flush()
 
 
 if __name__ == "__main__":
@@ -65,14 +65,41 @@ _goto_resolve_cmd() {
 # Usage:
 #   goto              Interactive menu (↑/↓, type-to-filter, Enter)
 #   goto <name>       Jump directly (exact or unique partial name)
+#   goto <name>/sub   Jump to a subdirectory of a bookmark
+#   goto -            Return to the previous directory in the jump history
+#   goto --back [N]   Step N entries back / forward through the jump history
+#   goto --forward [N]
+#   goto --history    Pick an entry from the jump history
 #   goto -h|--help    Show help
 goto() {
-    local selected_path arg
+    local selected_path arg origin="$PWD"
 
-    if [[ "${1:-}" == "-h" || "${1:-}" == "--help" ]]; then
-        goto_help
-        return 0
-    fi
+    case "${1:-}" in
+        -h|--help)
+            goto_help
+            return 0
+            ;;
+        -)
+            _goto_stack_previous
+            return
+            ;;
+        --back|--forward)
+            if [[ -n "${2:-}" && ! "$2" =~ ^[1-9][0-9]*$ ]]; then
+                echo "Error: $1 expects a positive number of steps" >&2
+                return 1
+            fi
+            if [[ "$1" == "--back" ]]; then
+                _goto_stack_move "-${2:-1}"
+            else
+                _goto_stack_move "${2:-1}"
+            fi
+            return
+            ;;
+        --history)
+            _goto_stack_pick
+            return
+            ;;
+    esac
 
     _goto_resolve_cmd || return 1
 
@@ -99,6 +126,8 @@ goto() {
         echo "Error: Failed to change to directory: $selected_path" >&2
         return 1
     }
+    _goto_stack_push "$origin"
+    _goto_stack_push "$PWD"
 }
 
 # Bash tab completion for bookmark names
@@ -108,6 +137,14 @@ if [[ -n "${BASH_VERSION:-}" ]] && [[ $- == *i* ]] && type complete >/dev/null 2
         COMPREPLY=()
         cur="${COMP_WORDS[COMP_CWORD]}"
         bookmarks_file="${HOME}/.dir-bookmarks.txt"
+        if [[ "$cur" == */* ]]; then
+            # name/sub/path: complete subdirectories beneath the bookmark
+            _goto_resolve_cmd 2>/dev/null || return 0
+            local IFS=$'\n'
+            COMPREPLY=($(eval $_GOTO_CMD --complete '"$cur"' 2>/dev/null))
+            type compopt >/dev/null 2>&1 && compopt -o nospace 2>/dev/null
+            return 0
+        fi
         if [[ -f "$bookmarks_file" ]]; then
             names=$(grep -v "^#" "$bookmarks_file" | grep "|" | cut -d"|" -f1 | sort -u)
             COMPREPLY=($(compgen -W "$names" -- "$cur"))
@@ -121,6 +158,13 @@ if [[ -n "${ZSH_VERSION:-}" ]] && [[ -o interactive ]]; then
     _goto_zsh_completion() {
         local bookmarks_file names
         bookmarks_file="${HOME}/.dir-bookmarks.txt"
+        if [[ "$PREFIX" == */* ]]; then
+            # name/sub/path: complete subdirectories beneath the bookmark
+            _goto_resolve_cmd 2>/dev/null || return 0
+            names=(${(f)"$(eval $_GOTO_CMD --complete '"$PREFIX"' 2>/dev/null)"})
+            compadd -U -S '' -a names
+            return 0
+        fi
         if [[ -f "$bookmarks_file" ]]; then
             names=(${(f)"$(grep -v "^#" "$bookmarks_file" | grep "|" | cut -d"|" -f1 | sort -u)"})
             compadd -a names
@@ -132,6 +176,188 @@ if [[ -n "${ZSH_VERSION:-}" ]] && [[ -o interactive ]]; then
     fi
 fi
 
+# Opt-in cd history: export BOOKMARK_HISTORY=1 before sourcing this file.
+# Visited directories are written into a fixed-size ring buffer of
+# _GOTO_HIST_RECORD-byte slots ("epoch<TAB>path\n", NUL padded) that
+# 'bookmark --suggest' aggregates. Recording never starts Python: the slot
+# is overwritten in place with a single dd, and each shell session walks its
+# own run of slots from a random start, so sessions need no shared counter
+# or lock. Paths longer than one slot are skipped.
+_GOTO_HIST_RECORD=256
+_GOTO_HIST_SLOTS=1024
+_GOTO_HIST_LAST=""
+
+_goto_history_record() {
+    # Runs first in PROMPT_COMMAND, so hand the command's $? on to later hooks
+    local status=$? dir="$PWD" now
+    [[ "$dir" == "$_GOTO_HIST_LAST" || "$dir" == "$HOME" ]] && return "$status"
+    _GOTO_HIST_LAST="$dir"
+    ((${#dir} < _GOTO_HIST_RECORD - 12)) || return "$status"
+    [[ "$dir" == *$'\n'* ]] && return "$status"
+    now="${EPOCHSECONDS:-$(date +%s)}"
+    printf '%s\t%s\n' "$now" "$dir" | dd of="${BOOKMARK_HISTORY_FILE:-$HOME/.dir-bookmarks-history.bin}" \
+        bs="$_GOTO_HIST_RECORD" count=1 seek="$_GOTO_HIST_SLOT" conv=sync,notrunc 2>/dev/null
+    _GOTO_HIST_SLOT=$(((_GOTO_HIST_SLOT + 1) % _GOTO_HIST_SLOTS))
+    return "$status"
+}
+
+if [[ "${BOOKMARK_HISTORY:-0}" == "1" ]] && [[ -z "${_GOTO_HIST_SLOT:-}" ]] && command -v dd >/dev/null 2>&1; then
+    _GOTO_HIST_SLOT=$((RANDOM % _GOTO_HIST_SLOTS))
+    if [[ -n "${ZSH_VERSION:-}" ]]; then
+        zmodload zsh/datetime 2>/dev/null
+        autoload -Uz add-zsh-hook && add-zsh-hook chpwd _goto_history_record
+    elif [[ -n "${BASH_VERSION:-}" ]]; then
+        PROMPT_COMMAND="_goto_history_record${PROMPT_COMMAND:+;$PROMPT_COMMAND}"
+    fi
+fi
+
+# Jump history: every goto records where it came from and where it went in
+# a per-session stack held in shell variables, so 'goto -', 'goto --back',
+# 'goto --forward' and 'goto --history' never start Python. On exit the
+# stack is written to its own session file and 'bookmark --merge-jumps'
+# folds it into the shared history in the background; sourcing this file
+# seeds the stack from that history. Functions set ksharrays under zsh so
+# indices are 0-based in both shells.
+_GOTO_JUMPS_FILE="${BOOKMARK_JUMPS_FILE:-$HOME/.dir-bookmarks-jumps.txt}"
+_GOTO_STACK_MAX=50
+
+_goto_stack_push() {
+    # Record a directory after the current position, dropping forward entries
+    [[ -n "${ZSH_VERSION:-}" ]] && setopt localoptions ksharrays
+    local dir="$1"
+    [[ -z "$dir" || "$dir" == *$'\n'* ]] && return 0
+    ((_GOTO_POS >= 0)) && [[ "${_GOTO_STACK[_GOTO_POS]}" == "$dir" ]] && return 0
+    _GOTO_STACK=("${_GOTO_STACK[@]:0:_GOTO_POS+1}" "$dir")
+    _goto_stack_trim
+    _GOTO_STACK_DIRTY=1
+}
+
+_goto_stack_trim() {
+    # Keep the newest _GOTO_STACK_MAX entries and point at the last one
+    [[ -n "${ZSH_VERSION:-}" ]] && setopt localoptions ksharrays
+    if ((${#_GOTO_STACK[@]} > _GOTO_STACK_MAX)); then
+        _GOTO_STACK=("${_GOTO_STACK[@]:${#_GOTO_STACK[@]}-_GOTO_STACK_MAX}")
+    fi
+    _GOTO_POS=$((${#_GOTO_STACK[@]} - 1))
+}
+
+_goto_stack_sync() {
+    # A plain cd since the last jump becomes the newest entry
+    [[ -n "${ZSH_VERSION:-}" ]] && setopt localoptions ksharrays
+    if ((_GOTO_POS < 0)) || [[ "${_GOTO_STACK[_GOTO_POS]}" != "$PWD" ]]; then
+        _goto_stack_push "$PWD"
+    fi
+}
+
+_goto_stack_cd() {
+    # Change to history entry $1 and make it the current position
+    [[ -n "${ZSH_VERSION:-}" ]] && setopt localoptions ksharrays
+    local dir="${_GOTO_STACK[$1]}"
+    if [[ ! -d "$dir" ]]; then
+        echo "Error: Directory not found: $dir" >&2
+        return 1
+    fi
+    echo "→ $dir" >&2
+    cd "$dir" || {
+        echo "Error: Failed to change to directory: $dir" >&2
+        return 1
+    }
+    _GOTO_POS=$1
+    _GOTO_STACK_DIRTY=1
+}
+
+_goto_stack_move() {
+    # Step $1 entries through the history (negative: back), stopping at either end
+    [[ -n "${ZSH_VERSION:-}" ]] && setopt localoptions ksharrays
+    local target
+    _goto_stack_sync
+    target=$((_GOTO_POS + $1))
+    ((target < 0)) && target=0
+    ((target >= ${#_GOTO_STACK[@]})) && target=$((${#_GOTO_STACK[@]} - 1))
+    if ((target == _GOTO_POS)); then
+        if (($1 < 0)); then
+            echo "No earlier directory in the goto history" >&2
+        else
+            echo "No later directory in the goto history" >&2
+        fi
+        return 1
+    fi
+    _goto_stack_cd "$target"
+}
+
+_goto_stack_previous() {
+    # Like 'cd -': jump to the entry before this one, as a new jump, so
+    # repeating it toggles between the last two directories
+    [[ -n "${ZSH_VERSION:-}" ]] && setopt localoptions ksharrays
+    local dir
+    _goto_stack_sync
+    if ((_GOTO_POS < 1)); then
+        echo "No earlier directory in the goto history" >&2
+        return 1
+    fi
+    dir="${_GOTO_STACK[_GOTO_POS-1]}"
+    if [[ ! -d "$dir" ]]; then
+        echo "Error: Directory not found: $dir" >&2
+        return 1
+    fi
+    _goto_stack_push "$dir"
+    _goto_stack_cd "$_GOTO_POS"
+}
+
+_goto_stack_pick() {
+    # Choose a history entry, newest first, with the select builtin
+    [[ -n "${ZSH_VERSION:-}" ]] && setopt localoptions ksharrays
+    local i choice entries=() PS3="Jump to (number, Ctrl-D to cancel): "
+    _goto_stack_sync
+    for ((i = ${#_GOTO_STACK[@]} - 1; i >= 0; i--)); do
+        if ((i == _GOTO_POS)); then
+            entries+=("${_GOTO_STACK[i]} (current)")
+        else
+            entries+=("${_GOTO_STACK[i]}")
+        fi
+    done
+    select choice in "${entries[@]}"; do
+        [[ -n "$choice" ]] && break
+        echo "Invalid selection: $REPLY" >&2
+    done
+    [[ -z "$choice" ]] && return 1
+    _goto_stack_cd $((${#_GOTO_STACK[@]} - REPLY))
+}
+
+_goto_jumps_save() {
+    # Exit hook: write this session's stack and merge it in the background
+    [[ -n "${ZSH_VERSION:-}" ]] && setopt localoptions ksharrays
+    ((_GOTO_STACK_DIRTY)) || return 0
+    ((${#_GOTO_STACK[@]})) || return 0
+    printf '%s\n' "${_GOTO_STACK[@]}" > "${_GOTO_JUMPS_FILE}.$$.${RANDOM}" 2>/dev/null || return 0
+    _GOTO_STACK_DIRTY=0
+    _goto_resolve_cmd 2>/dev/null || return 0
+    (eval $_GOTO_CMD --merge-jumps < /dev/null > /dev/null 2>&1 &)
+}
+
+_goto_chain_exit_trap() {
+    # Run _goto_jumps_save on exit without replacing an existing EXIT trap
+    eval "set -- $(trap -p EXIT)"
+    trap "_goto_jumps_save${3:+; $3}" EXIT
+}
+
+if [[ -z "${_GOTO_POS:-}" ]]; then
+    _GOTO_STACK=()
+    _GOTO_STACK_DIRTY=0
+    if [[ -r "$_GOTO_JUMPS_FILE" ]]; then
+        while IFS= read -r _goto_line; do
+            [[ "$_goto_line" == /* ]] && _GOTO_STACK+=("$_goto_line")
+        done < "$_GOTO_JUMPS_FILE"
+        unset _goto_line
+    fi
+    _goto_stack_trim
+    if [[ -n "${ZSH_VERSION:-}" ]]; then
+        autoload -Uz add-zsh-hook && add-zsh-hook zshexit _goto_jumps_save
+    elif [[ -n "${BASH_VERSION:-}" ]]; then
+        _goto_chain_exit_trap
+    fi
+fi
+
 goto_help() {
     cat << 'EOF'
 goto - Navigate to bookmarked directories
@@ -139,6 +365,11 @@ goto - Navigate to bookmarked directories
 Usage:
     goto                    Interactive menu
     goto <name>             Jump by exact or unique partial name
+    goto <name>/sub/path    Jump to a subdirectory of a bookmark (Tab completes)
+    goto -                  Return to the previous directory (repeat to toggle)
+    goto --back [N]         Go N entries back in the jump history (default 1)
+    goto --forward [N]      Go N entries forward in the jump history
+    goto --history          Pick a directory from the jump history
     goto -h, --help         Show this help
 
 Interactive keys:
@@ -148,6 +379,7 @@ Interactive keys:
     1-9…                    Jump by number (multi-digit, e.g. 12)
     PgUp / PgDn             Page up/down
     Home / End              First / last item
+    Ctrl-P                  Toggle directory preview (BOOKMARK_PREVIEW=1: on)
     Enter                   Select
     Esc                     Clear filter, or quit if empty
     q                       Quit (when filter empty)
@@ -156,9 +388,17 @@ Examples:
     goto                    # open interactive menu
     goto tyro               # unique partial match
     goto "tyro dashboard"   # exact name with spaces
+    goto tyro/src/api       # subdirectory beneath the tyro bookmark
+    goto --back 2           # two jumps back, without starting Python
 
 Notes:
     - Bookmarks: bookmark / bookmark --listall / bookmark --help
+    - With BOOKMARK_HISTORY=1, visited directories are recorded and
+      'goto <name>' also reaches often-visited unbookmarked directories;
+      see 'bookmark --suggest' and 'bookmark --promote'
+    - The jump history keeps the last 50 jumps of this session; on exit it
+      is merged into ~/.dir-bookmarks-jumps.txt (BOOKMARK_JUMPS_FILE),
+      which seeds new sessions
     - Storage: ~/.dir-bookmarks.txt
 EOF
 }
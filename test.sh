@@ -95,6 +95,47 @@ cleanup_test_files() {
     log_pass "Cleanup completed"
 }
 
+# Simulate many hosts editing one shared sync directory at the same time.
+# Each host gets its own HOME (like a separate machine) and they all race on
+# BOOKMARK_SYNC_DIR. Usage: simulate_sync_hosts HOSTS
+simulate_sync_hosts() {
+    local hosts="$1"
+    local sim_dir i expected
+    sim_dir=$(mktemp -d)
+    mkdir -p "$sim_dir/sync"
+
+    # Round 1: every host adds its own bookmark concurrently
+    for ((i = 1; i <= hosts; i++)); do
+        mkdir -p "$sim_dir/home-$i" "$sim_dir/dir-$i"
+        (cd "$sim_dir/dir-$i" && echo "sim-$i" | HOME="$sim_dir/home-$i" BOOKMARK_HOST="host-$i" \
+            BOOKMARK_SYNC_DIR="$sim_dir/sync" python3 "$SCRIPT_DIR/bookmark.py" &> /dev/null) &
+    done
+    wait
+
+    # Round 2: odd hosts remove their bookmark while even hosts add a second one
+    for ((i = 1; i <= hosts; i++)); do
+        if ((i % 2)); then
+            (cd "$sim_dir/dir-$i" && HOME="$sim_dir/home-$i" BOOKMARK_HOST="host-$i" \
+                BOOKMARK_SYNC_DIR="$sim_dir/sync" python3 "$SCRIPT_DIR/bookmark.py" --remove &> /dev/null) &
+        else
+            (mkdir -p "$sim_dir/dir-$i/sub" && cd "$sim_dir/dir-$i/sub" && echo "sim-$i-sub" | HOME="$sim_dir/home-$i" \
+                BOOKMARK_HOST="host-$i" BOOKMARK_SYNC_DIR="$sim_dir/sync" python3 "$SCRIPT_DIR/bookmark.py" &> /dev/null) &
+        fi
+    done
+    wait
+
+    # Every host must now see the same merged state
+    expected=$(HOME="$sim_dir/home-1" BOOKMARK_SYNC_DIR="$sim_dir/sync" python3 "$SCRIPT_DIR/bookmark.py" --listall 2>&1)
+    for ((i = 2; i <= hosts; i++)); do
+        if [[ "$(HOME="$sim_dir/home-$i" BOOKMARK_SYNC_DIR="$sim_dir/sync" python3 "$SCRIPT_DIR/bookmark.py" --listall 2>&1)" != "$expected" ]]; then
+            rm -rf "$sim_dir"
+            return 1
+        fi
+    done
+    rm -rf "$sim_dir"
+    [[ "$expected" == *"Total: $((hosts / 2 * 2)) bookmark(s)"* ]]
+}
+
 # Main test suite
 main() {
     echo "Directory Bookmark Manager v3.0 - Comprehensive Test Suite"
@@ -205,6 +246,114 @@ main() {
     # Test 24: File permissions
     run_test "File permissions" "touch ~/.dir-bookmarks-test && rm ~/.dir-bookmarks-test &> /dev/null"
     
+    # Test 25: Layered system/team bookmarks
+    local layer_dir
+    layer_dir=$(mktemp -d)
+    printf 'layer-system|/usr\nlayer-shared|/opt\n' > "$layer_dir/system.txt"
+    printf 'layer-shared|/var\n' > "$layer_dir/team.txt"
+    run_test "Layered bookmarks" "[[ \$(BOOKMARK_SYSTEM_FILE='$layer_dir/system.txt' BOOKMARK_TEAM_FILE='$layer_dir/team.txt' python3 '$SCRIPT_DIR/bookmark.py' --go layer-shared 2>/dev/null) == /var ]]"
+    rm -rf "$layer_dir"
+
+    # Test 26: Concurrent multi-host sync
+    run_test "Concurrent multi-host sync" "simulate_sync_hosts 16"
+
+    # Test 27: Machine-readable list output
+    run_test "Machine-readable list output" "python3 '$SCRIPT_DIR/bookmark.py' --listall --format json | python3 -c 'import json, sys; json.load(sys.stdin)' && python3 '$SCRIPT_DIR/bookmark.py' --list --format jsonl --unsorted | python3 -c 'import json, sys; [json.loads(l) for l in sys.stdin]'"
+
+    # Test 28: Subpath jump and completion
+    local subpath_dir
+    subpath_dir=$(mktemp -d)
+    mkdir -p "$subpath_dir/src/module"
+    run_test "Subpath jump and completion" "(cd '$subpath_dir' && echo 'subpath-test' | python3 '$SCRIPT_DIR/bookmark.py' &> /dev/null) && [[ \$(python3 '$SCRIPT_DIR/bookmark.py' --go subpath-test/src/module 2>/dev/null) == '$subpath_dir/src/module' ]] && python3 '$SCRIPT_DIR/bookmark.py' --complete subpath-test/s | grep -x 'subpath-test/src/' > /dev/null"
+    rm -rf "$subpath_dir"
+
+    # Test 29: Multi-select batch export
+    run_test "Multi-select batch export" "echo 'all' | python3 '$SCRIPT_DIR/bookmark.py' --select-export 2>/dev/null | grep '|' > /dev/null"
+
+    # Test 30: Symlink-aware remove
+    local alias_dir
+    alias_dir=$(mktemp -d)
+    mkdir -p "$alias_dir/real"
+    ln -s "$alias_dir/real" "$alias_dir/link"
+    run_test "Symlink-aware remove" "(cd '$alias_dir/real' && echo 'alias-test' | python3 '$SCRIPT_DIR/bookmark.py' &> /dev/null) && python3 '$SCRIPT_DIR/bookmark.py' --remove '$alias_dir/link' &> /dev/null && ! grep -q 'alias-test|' ~/.dir-bookmarks.txt"
+    rm -rf "$alias_dir"
+
+    # Test 31: cd-history ring buffer suggestions
+    local history_dir
+    history_dir=$(mktemp -d)
+    mkdir -p "$history_dir/visited-often"
+    run_test "cd-history suggestions" "BOOKMARK_HISTORY=1 BOOKMARK_HISTORY_FILE='$history_dir/history.bin' bash -c 'source \"$SCRIPT_DIR/goto_function.sh\"; cd \"$history_dir/visited-often\" && _goto_history_record' && BOOKMARK_HISTORY_FILE='$history_dir/history.bin' python3 '$SCRIPT_DIR/bookmark.py' --suggest 2>&1 | grep visited-often > /dev/null"
+    rm -rf "$history_dir"
+
+    # Test 32: Per-project bookmark file discovery
+    local project_dir
+    project_dir=$(mktemp -d)
+    mkdir -p "$project_dir/src/nested"
+    printf 'project-src|src\n' > "$project_dir/.dir-bookmarks"
+    run_test "Project bookmark discovery" "[[ \$(cd '$project_dir/src/nested' && python3 '$SCRIPT_DIR/bookmark.py' --go project-src 2>/dev/null) == '$project_dir/src' ]]"
+    rm -rf "$project_dir"
+
+    # Test 33: Selector keystroke latency (pty benchmark)
+    run_test "Selector latency benchmark" "python3 '$SCRIPT_DIR/benchmark.py' --sizes 200 --budget-ms 250 &> /dev/null"
+
+    # Test 34: Vectorized filtering matches the pure-Python search
+    if python3 -c "import numpy" 2>/dev/null; then
+        run_test "Vectorized candidate filtering" "python3 -c \"import sys; sys.path.insert(0, '$SCRIPT_DIR'); from bookmark import CandidateIndex as C; e = [('proj-%d' % i, '/w/t%d/Repo-%d' % (i % 7, i)) for i in range(3000)]; a, b = C(e, use_numpy=True), C(e, use_numpy=False); sys.exit(any(a.search(q) != b.search(q) or a.exact(q) != b.exact(q) for q in ('proj-12', 'REPO', 't3/', 'x', '')))\""
+    else
+        log_warn "Skipping vectorized candidate filtering: NumPy is not installed"
+    fi
+
+    # Test 35: Compact bookmark table round-trips entries and reports memory
+    run_test "Compact bookmark table" "python3 -c \"import sys; sys.path.insert(0, '$SCRIPT_DIR'); from bookmark import BookmarkTable; e = [('b', '/home/u/a'), ('A', '/home/u/b/'), ('r', '/'), ('x', 'rel/dir')]; t = BookmarkTable(e); sys.exit(list(t) != e or t[1:3] != e[1:3] or [n for n, _ in t.sorted_by_name()] != ['A', 'b', 'r', 'x'])\" && python3 '$SCRIPT_DIR/benchmark.py' --sizes 100 --memory --json | grep table_kib > /dev/null"
+
+    # Test 36: Library API resolves in-process without terminal output
+    local store_dir=$(mktemp -d)
+    mkdir -p "$store_dir/lib/src"
+    run_test "Library store API" "python3 -c \"import sys; sys.path.insert(0, '$SCRIPT_DIR'); from bookmark import BookmarkStore; s = BookmarkStore('$store_dir/bookmarks.txt'); s.add('lib-test', '$store_dir/lib'); ok = all(s.resolve('lib-test/src')[1] == '$store_dir/lib/src' for _ in range(3)) and s.get('LIB-TEST') == '$store_dir/lib' and s.remove('lib-test') and s.get('lib-test') is None; sys.exit(not ok)\" 2>&1 | wc -c | grep -x 0 > /dev/null && (python3 -c \"import sys; sys.path.insert(0, '$SCRIPT_DIR'); from bookmark import BookmarkStore; BookmarkStore('$store_dir/bookmarks.txt').add('bad', '$store_dir/missing')\" 2>&1; true) | grep 'ValueError: Not a directory' > /dev/null"
+    rm -rf "$store_dir"
+
+    # Test 37: Metrics accumulate across invocations in a Prometheus textfile
+    local metrics_dir=$(mktemp -d)
+    run_test "Prometheus textfile metrics" "BOOKMARK_METRICS_FILE='$metrics_dir/bookmark.prom' python3 '$SCRIPT_DIR/bookmark.py' --go no-such-bookmark-xyz &> /dev/null; BOOKMARK_METRICS_FILE='$metrics_dir/bookmark.prom' python3 '$SCRIPT_DIR/bookmark.py' --go no-such-bookmark-xyz &> /dev/null; grep -x 'bookmark_lookups_total{outcome=\"miss\"} 2' '$metrics_dir/bookmark.prom' > /dev/null"
+    rm -rf "$metrics_dir"
+
+    # Test 38: Selector draws before the store is parsed and finishes the load
+    run_test "Progressive selector loading" "python3 '$SCRIPT_DIR/benchmark.py' --sizes 50000 --json 2>/dev/null | python3 -c 'import json, sys; r = json.load(sys.stdin); s = r[\"results\"][\"50000\"]; sys.exit(r[\"failures\"] or s[\"first-frame\"][\"loading_frames\"] != 1)'"
+
+    # Test 39: Auto-added bookmarks are evicted least recently used first
+    local retention_dir=$(mktemp -d)
+    mkdir -p "$retention_dir"/{a1,a2,a3,m1}
+    run_test "Auto bookmark retention" "BOOKMARK_MAX_AUTO=2 python3 -c \"import sys; sys.path.insert(0, '$SCRIPT_DIR'); from bookmark import BookmarkStore; s = BookmarkStore('$retention_dir/bm.txt'); s.add('m1', '$retention_dir/m1'); s.add('a1', '$retention_dir/a1', auto=True); s.add('a2', '$retention_dir/a2', auto=True); s.record_use('$retention_dir/a1'); s.add('a3', '$retention_dir/a3', auto=True); sys.exit(sorted(s.load().values()) != ['a1', 'a3', 'm1'])\""
+    rm -rf "$retention_dir"
+
+    # Test 40: Host-aware prefix rewrites apply to lookups and --rewrite-check
+    local rewrite_dir=$(mktemp -d)
+    mkdir -p "$rewrite_dir/mnt/work/proj"
+    echo "rewrite-test|/home/elsewhere/work/proj" > "$rewrite_dir/bm.txt"
+    echo "rw-host-*|/home/elsewhere/work|$rewrite_dir/mnt/work" > "$rewrite_dir/rules.txt"
+    run_test "Host-aware path rewrites" "export BOOKMARK_HOST=rw-host-1 BOOKMARK_REWRITE_FILE='$rewrite_dir/rules.txt'; python3 -c \"import sys; sys.path.insert(0, '$SCRIPT_DIR'); from bookmark import BookmarkStore; sys.exit(BookmarkStore('$rewrite_dir/bm.txt').get('rewrite-test') != '$rewrite_dir/mnt/work/proj')\" && (python3 '$SCRIPT_DIR/bookmark.py' --rewrite-check 2>&1; true) | grep 'rw-host-1' > /dev/null"
+    rm -rf "$rewrite_dir"
+
+    # Test 41: goto back/forward history runs in the shell and is merged on exit
+    local jumps_dir=$(mktemp -d)
+    mkdir -p "$jumps_dir"/{a,b,c}
+    printf '%s\n' "$jumps_dir/a" "$jumps_dir/b" > "$jumps_dir/jumps.txt"
+    run_test "Goto jump history" "export BOOKMARK_JUMPS_FILE='$jumps_dir/jumps.txt'; bash -c 'source \"$SCRIPT_DIR/goto_function.sh\"; cd \"$jumps_dir/b\"; goto --back && [[ \$PWD == \"$jumps_dir/a\" ]] && goto --forward && cd \"$jumps_dir/c\" && goto - && [[ \$PWD == \"$jumps_dir/b\" ]]' 2>/dev/null && python3 '$SCRIPT_DIR/bookmark.py' --merge-jumps && [[ \"\$(tr '\\n' ' ' < '$jumps_dir/jumps.txt')\" == '$jumps_dir/a $jumps_dir/c $jumps_dir/b ' ]]"
+    rm -rf "$jumps_dir"
+
+    # Test 42: Scripting commands apply a batch all-or-nothing with script exit codes
+    local batch_dir=$(mktemp -d)
+    mkdir -p "$batch_dir"/{one,two}
+    run_test "Batched scripting commands" "(export HOME='$batch_dir'; python3 '$SCRIPT_DIR/bookmark.py' --add one '$batch_dir/one' 2>/dev/null && { printf 'add two %s\\nremove-name missing\\n' '$batch_dir/two' | python3 '$SCRIPT_DIR/bookmark.py' --batch 2>/dev/null; [[ \$? == 1 ]]; } && ! grep -q '^two|' '$batch_dir/.dir-bookmarks.txt' && printf 'add two %s --auto\\nrename one \"one more\"\\n' '$batch_dir/two' | python3 '$SCRIPT_DIR/bookmark.py' --batch 2>/dev/null && grep -qx 'one more|$batch_dir/one' '$batch_dir/.dir-bookmarks.txt' && { python3 '$SCRIPT_DIR/bookmark.py' --rename one 2>/dev/null; [[ \$? == 2 ]]; })"
+    rm -rf "$batch_dir"
+
+    # Test 43: Enabling sync keeps the bookmarks already in the file, and churn is compacted away
+    local seed_dir=$(mktemp -d)
+    mkdir -p "$seed_dir"/{one,two,new,churn}
+    printf 'one|%s/one\ntwo|%s/two\n' "$seed_dir" "$seed_dir" > "$seed_dir/.dir-bookmarks.txt"
+    run_test "Sync seeding and compaction" "(export HOME='$seed_dir' BOOKMARK_SYNC_DIR='$seed_dir/sync'; cd '$seed_dir/new' && echo 'new' | python3 '$SCRIPT_DIR/bookmark.py' &> /dev/null && [[ \$(grep -c '^[a-z]*|' '$seed_dir/.dir-bookmarks.txt') == 3 ]] && python3 -c \"import sys; sys.path.insert(0, '$SCRIPT_DIR'); from bookmark import BookmarkStore; s = BookmarkStore(); [(s.add('churn', '$seed_dir/churn'), s.remove('churn')) for _ in range(300)]\" && [[ \$(cat '$seed_dir'/sync/*.log | wc -l) -lt 256 ]] && [[ \$(python3 '$SCRIPT_DIR/bookmark.py' --go one 2>/dev/null) == '$seed_dir/one' ]])"
+    rm -rf "$seed_dir"
+
     # Cleanup after tests
     cleanup_test_files
     